@@ -1,18 +1,141 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+"""
+db.py
+
+Engine / Session της εφαρμογής, χτισμένα από config:
+
+- DATABASE_URL: οποιοδήποτε SQLAlchemy URL (default: SQLite αρχείο backend/app.db)
+- SQLite (αρχείο): σε κάθε νέα σύνδεση εφαρμόζονται PRAGMAs
+    journal_mode=WAL      => readers δεν μπλοκάρουν από τον writer (και αντίστροφα)
+    synchronous=NORMAL    => ασφαλές με WAL, χωρίς fsync σε κάθε commit
+    mmap_size / cache_size / busy_timeout (ρυθμίζονται από env)
+- Άλλες βάσεις (π.χ. Postgres): ρητό pool sizing, pre-ping και recycle.
+- Async engine / AsyncSession (get_async_db) για τις async routes, στην ίδια DB:
+  ASYNC_DATABASE_URL ή παράγεται από το DATABASE_URL (sqlite => aiosqlite, postgresql => asyncpg).
+  Το sync SessionLocal / get_db μένει για scripts, CLI και sync routes.
 
+Env (με prefix, default "DB"):
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+    DB_SQLITE_WAL (1/0), DB_SQLITE_MMAP_SIZE (bytes), DB_SQLITE_CACHE_SIZE_KB, DB_SQLITE_BUSY_TIMEOUT_MS
+"""
+
+import os
 from pathlib import Path
 
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, DeclarativeBase
+
 BASE_DIR = Path(__file__).resolve().parent.parent  # .../backend
-DB_URL = f"sqlite:///{BASE_DIR / 'app.db'}"
+DB_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR / 'app.db'}")
+
+
+def _env(prefix: str, name: str, default: str) -> str:
+    return os.getenv(f"{prefix}_{name}", default)
+
+
+def _apply_sqlite_pragmas(engine: Engine, prefix: str) -> None:
+    """PRAGMAs σε κάθε νέα DBAPI σύνδεση (ισχύουν ανά connection)."""
+    wal = _env(prefix, "SQLITE_WAL", "1") == "1"
+    pragmas = [
+        f"PRAGMA busy_timeout={int(_env(prefix, 'SQLITE_BUSY_TIMEOUT_MS', '5000'))}",
+        f"PRAGMA mmap_size={int(_env(prefix, 'SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+        # αρνητικό cache_size => KiB αντί για pages
+        f"PRAGMA cache_size={-int(_env(prefix, 'SQLITE_CACHE_SIZE_KB', '65536'))}",
+    ]
+    if wal:
+        pragmas = ["PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL"] + pragmas
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _engine_kwargs(url: str, prefix: str) -> dict:
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    kwargs = {
+        "pool_size": int(_env(prefix, "POOL_SIZE", "10")),
+        "max_overflow": int(_env(prefix, "MAX_OVERFLOW", "20")),
+        "pool_timeout": float(_env(prefix, "POOL_TIMEOUT", "30")),
+        "pool_recycle": int(_env(prefix, "POOL_RECYCLE", "1800")),
+        # pre-ping: χρήσιμο σε server DB (dropped connections), περιττό round-trip σε SQLite αρχείο
+        "pool_pre_ping": _env(prefix, "POOL_PRE_PING", "0" if is_sqlite else "1") == "1",
+    }
+    if is_sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}  # SQLite requirement
+    return kwargs
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
 
-engine = create_engine(
-    DB_URL,
-    connect_args={"check_same_thread": False},  # SQLite requirement
-)
+def build_engine(url: str, prefix: str = "DB") -> Engine:
+    """
+    Engine από URL + env ρυθμίσεις (βλ. docstring του module).
+    Το ίδιο factory χρησιμοποιείται και για ξεχωριστές DB (π.χ. TENANT_DATA_URL, prefix="TENANT_DATA").
+    """
+    if _is_memory_sqlite(url):
+        # in-memory: δεν έχει νόημα WAL / pool sizing
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    engine = create_engine(url, **_engine_kwargs(url, prefix))
+    if make_url(url).get_backend_name() == "sqlite":
+        _apply_sqlite_pragmas(engine, prefix)
+    return engine
+
+
+# Sync URL => async driver (αν δεν δοθεί ρητά ASYNC_DATABASE_URL)
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_url_for(url: str) -> str:
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.drivername != parsed.get_backend_name():
+        return url  # ήδη με συγκεκριμένο driver (π.χ. postgresql+asyncpg)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str, prefix: str = "DB") -> AsyncEngine:
+    """Async εκδοχή του build_engine (ίδια pool settings / PRAGMAs)."""
+    if _is_memory_sqlite(url):
+        return create_async_engine(url)
+
+    engine = create_async_engine(url, **_engine_kwargs(url, prefix))
+    if make_url(url).get_backend_name() == "sqlite":
+        # τα connect events ζουν στο sync_engine (ο aiosqlite adapter δίνει sync-style cursor)
+        _apply_sqlite_pragmas(engine.sync_engine, prefix)
+    return engine
+
+
+engine = build_engine(DB_URL)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+ASYNC_DB_URL = os.getenv("ASYNC_DATABASE_URL") or async_url_for(DB_URL)
+
+# Lazy: τα sync paths (scripts, CLI, sync tests) δεν χρειάζονται async driver
+_ASYNC_ENGINE: Optional[AsyncEngine] = None
+_ASYNC_SESSION: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _ASYNC_ENGINE, _ASYNC_SESSION
+    if _ASYNC_ENGINE is None:
+        _ASYNC_ENGINE = build_async_engine(ASYNC_DB_URL)
+        # expire_on_commit=False: τα objects μένουν usable μετά το commit χωρίς refresh query
+        _ASYNC_SESSION = async_sessionmaker(bind=_ASYNC_ENGINE, autoflush=False, expire_on_commit=False)
+    return _ASYNC_ENGINE
+
 class Base(DeclarativeBase):
     pass
 
@@ -22,3 +145,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def async_session() -> AsyncSession:
+    """Νέο AsyncSession (π.χ. για streaming responses που ζουν πέρα από το dependency)."""
+    get_async_engine()
+    return _ASYNC_SESSION()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with async_session() as db:
+        yield db
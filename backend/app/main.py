@@ -4,22 +4,25 @@ main.py
 Κεντρικό entrypoint της FastAPI εφαρμογής.
 - Δημιουργεί το FastAPI app
 - Ρυθμίζει CORS
+- Admission control (load shedding) για τα decision endpoints
 - Δημιουργεί DB tables (SQLite)
 - Συνδέει όλους τους routers
 """
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
 from app.db import engine
 from app.models import Base
+from app.services.admission import AdmissionMiddleware, admission_stats, default_rules
 
 # Routers
 from app.routes.auth import router as auth_router
 from app.routes.tenants import router as tenants_router
 from app.routes.documents import router as documents_router
 from app.routes.decision import router as decision_router
+from app.routes.auth import get_current_user
 
 
 # -------------------------
@@ -28,6 +31,12 @@ from app.routes.decision import router as decision_router
 # Δημιουργεί τα tables αν δεν υπάρχουν
 Base.metadata.create_all(bind=engine)
 
+# Indexes που προστέθηκαν μετά τη δημιουργία ενός table (το create_all δεν τα
+# προσθέτει σε tables που ήδη υπάρχουν)
+for _table in Base.metadata.sorted_tables:
+    for _index in _table.indexes:
+        _index.create(bind=engine, checkfirst=True)
+
 
 def get_allowed_origins() -> list[str]:
     """
@@ -42,6 +51,17 @@ def get_allowed_origins() -> list[str]:
 # -------------------------
 app = FastAPI(title="Agent Platform MVP", version="0.1.0")
 
+API_PREFIX = "/api"
+
+
+# -------------------------
+# Admission control
+# -------------------------
+# Προστίθεται ΠΡΙΝ το CORS ώστε το CORS να είναι εξωτερικά και τα 429/503
+# να έχουν κι αυτά CORS headers (αλλιώς ο browser βλέπει "CORS error").
+ADMISSION_RULES = default_rules(API_PREFIX)
+app.add_middleware(AdmissionMiddleware, rules=ADMISSION_RULES)
+
 
 # -------------------------
 # CORS
@@ -63,11 +83,15 @@ def root():
     return {"status": "ok", "service": "agent-platform"}
 
 
+@app.get("/admission", tags=["Health"], dependencies=[Depends(get_current_user)])
+async def admission():
+    # queue depth / running / shed counts ανά gate (μόνο για authenticated users)
+    return admission_stats(ADMISSION_RULES)
+
+
 # -------------------------
 # Routers
 # -------------------------
-API_PREFIX = "/api"
-
 app.include_router(auth_router, prefix=API_PREFIX)
 app.include_router(tenants_router, prefix=API_PREFIX)
 app.include_router(documents_router, prefix=API_PREFIX)
@@ -1,5 +1,6 @@
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Integer, Float, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import datetime, timezone
 import uuid
 
 from app.db import Base
@@ -7,8 +8,15 @@ from app.db import Base
 def _uuid() -> str:
     return str(uuid.uuid4())
 
+def _utcnow() -> datetime:
+    # naive UTC: ίδια αναπαράσταση σε SQLite και server DBs (συγκρίσιμη στα keyset cursors)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class Tenant(Base):
     __tablename__ = "tenants"
+    # Λίστα ανά org_type σε σειρά id (keyset) => index range scan χωρίς sort
+    __table_args__ = (Index("ix_tenants_org_type_id", "org_type", "id"),)
+
     id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
     name: Mapped[str] = mapped_column(String, nullable=False)
     org_type: Mapped[str] = mapped_column(String, nullable=False)
@@ -24,3 +32,48 @@ class User(Base):
 
     tenant_id: Mapped[str] = mapped_column(String, ForeignKey("tenants.id"), nullable=False)
     tenant: Mapped["Tenant"] = relationship(back_populates="users")
+
+class Document(Base):
+    __tablename__ = "documents"
+    # Λίστα ανά tenant, νεότερα πρώτα, keyset στο (created_at, id) => index range scan
+    __table_args__ = (Index("ix_documents_tenant_created", "tenant_id", "created_at", "id"),)
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)  # <uuid><ext>, όπως το όνομα αρχείου
+    tenant_id: Mapped[str] = mapped_column(String, ForeignKey("tenants.id"), nullable=False)
+    original_name: Mapped[str] = mapped_column(String, nullable=False)
+    path: Mapped[str] = mapped_column(String, nullable=False)  # αναφορά στο blob store
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=_utcnow)
+
+
+# -------------------------
+# Tenant business data (students / finance / absences / limits)
+# -------------------------
+# Ίδιο schema με το MOCK_DB (app/services/mock_db.py), ένας πίνακας ανά entity.
+# Το (tenant_id, key) είναι primary key => indexed lookups ανά tenant.
+
+class StudentRecord(Base):
+    __tablename__ = "tenant_students"
+    tenant_id: Mapped[str] = mapped_column(String, ForeignKey("tenants.id"), primary_key=True)
+    student_id: Mapped[str] = mapped_column(String, primary_key=True)
+    name: Mapped[str] = mapped_column(String, nullable=False, default="")
+    status: Mapped[str] = mapped_column(String, nullable=False, default="active")
+
+class FinanceRecord(Base):
+    __tablename__ = "tenant_finance"
+    tenant_id: Mapped[str] = mapped_column(String, ForeignKey("tenants.id"), primary_key=True)
+    student_id: Mapped[str] = mapped_column(String, primary_key=True)
+    balance_eur: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+class AbsenceRecord(Base):
+    __tablename__ = "tenant_absences"
+    tenant_id: Mapped[str] = mapped_column(String, ForeignKey("tenants.id"), primary_key=True)
+    student_id: Mapped[str] = mapped_column(String, primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+class TenantLimit(Base):
+    __tablename__ = "tenant_limits"
+    tenant_id: Mapped[str] = mapped_column(String, ForeignKey("tenants.id"), primary_key=True)
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -1,17 +1,30 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.db import get_async_db
 from app.models import Tenant, User
-from app.services.auth import hash_password, verify_password, create_access_token, decode_token
+from app.services.auth import (
+    PasswordHasherBusy,
+    hash_password_async,
+    verify_password_async,
+    create_access_token,
+    decode_token,
+)
+from app.services.principals import Principal, load_principal_async
 
 router = APIRouter(tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+def _busy() -> HTTPException:
+    # Το password hashing pool είναι saturated: fail fast αντί να μαζεύονται requests
+    return HTTPException(status_code=503, detail="Authentication service busy, retry shortly", headers={"Retry-After": "1"})
+
+
 # -------------------------
 # Schemas
 # -------------------------
@@ -38,29 +51,32 @@ class MeResponse(BaseModel):
 # Signup
 # -------------------------
 @router.post("/auth/signup")
-def signup(payload: SignupRequest, db: Session = Depends(get_db)):
+async def signup(payload: SignupRequest, db: AsyncSession = Depends(get_async_db)):
 
     # Check if user exists
-    existing = db.query(User).filter(User.email == payload.email.lower()).first()
+    existing = await db.scalar(select(User.id).where(User.email == payload.email.lower()))
     if existing:
         raise HTTPException(status_code=409, detail="Email already registered")
 
-    # Create tenant
+    # Hash πρώτα (εκτός event loop): αν το pool είναι saturated δεν γράφουμε τίποτα στη DB
+    try:
+        password_hash = await hash_password_async(payload.password)
+    except PasswordHasherBusy:
+        raise _busy()
+
+    # Create tenant (flush => παίρνει id) + admin user, σε ένα transaction
     tenant = Tenant(name=payload.org_name, org_type=payload.org_type)
     db.add(tenant)
-    db.commit()
-    db.refresh(tenant)
+    await db.flush()
 
-    # Create admin user
     user = User(
         email=payload.email.lower(),
-        password_hash=hash_password(payload.password),
+        password_hash=password_hash,
         tenant_id=tenant.id,
         role="admin",
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
 
     # Create token
     token = create_access_token({
@@ -83,11 +99,18 @@ def signup(payload: SignupRequest, db: Session = Depends(get_db)):
 # Login
 # -------------------------
 @router.post("/auth/login", response_model=TokenResponse)
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
 
-    user = db.query(User).filter(User.email == form.username.lower()).first()
-    if not user or not verify_password(form.password, user.password_hash):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    user = (
+        await db.execute(
+            select(User.id, User.password_hash, User.tenant_id, User.role).where(User.email == form.username.lower())
+        )
+    ).first()
+    try:
+        if not user or not await verify_password_async(form.password, user.password_hash):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+    except PasswordHasherBusy:
+        raise _busy()
 
     token = create_access_token({
         "sub": user.id,
@@ -101,14 +124,18 @@ def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get
 # -------------------------
 # Current user
 # -------------------------
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """
+    Verify JWT + επιστρέφει τον Principal (user + tenant/org_type).
+    Για επαναλαμβανόμενους callers: 0 DB queries (principal cache).
+    """
 
     try:
         payload = decode_token(token)
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == payload.get("sub")).first()
+    user = await load_principal_async(db, payload.get("sub"))
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token user")
 
@@ -119,15 +146,14 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 # /auth/me
 # -------------------------
 @router.get("/auth/me", response_model=MeResponse)
-def me(user = Depends(get_current_user), db: Session = Depends(get_db)):
+async def me(user: Principal = Depends(get_current_user)):
 
-    tenant = db.query(Tenant).filter(Tenant.id == user.tenant_id).first()
-    if not tenant:
+    if user.org_type is None:
         raise HTTPException(status_code=401, detail="Tenant not found")
 
     return MeResponse(
         user_id=user.id,
         email=user.email,
-        tenant_id=tenant.id,
-        org_type=tenant.org_type,
+        tenant_id=user.tenant_id,
+        org_type=user.org_type,
     )
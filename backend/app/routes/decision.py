@@ -1,68 +1,159 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
-from sqlalchemy.orm import Session
+from typing import Optional, Dict, Any, List
+import asyncio
+import os
 
-from app.db import get_db
-from app.models import Tenant, User
 from app.routes.auth import get_current_user
-from app.services.rules import decide
-from app.services.actions import run_actions
+from app.services.rules import decide, decide_many, decision_cache_stats
+from app.services.actions import ACTION_WORKERS, prime_loader, run_actions_async
+from app.services.dataloader import TenantDataLoader
+from app.services.principals import Principal
 
 router = APIRouter(tags=["decision"])
 
 
+# Μέγιστο πλήθος items ανά batch request
+DECISION_BATCH_MAX_ITEMS = int(os.getenv("DECISION_BATCH_MAX_ITEMS", "5000"))
+
+# Πόσα items ενός batch τρέχουν actions ταυτόχρονα. Τα sync actions μοιράζονται τον
+# executor (ACTION_WORKERS threads) με τα single requests: ένα batch δεν τον γεμίζει.
+DECISION_BATCH_CONCURRENCY = max(1, int(os.getenv("DECISION_BATCH_CONCURRENCY", str(ACTION_WORKERS // 2))))
+
+
 class DecisionRequest(BaseModel):
     question: str
     fields: Optional[Dict[str, Any]] = None
 
 
-@router.post("/tenants/{tenant_id}/decision")
-def decision(
-    tenant_id: str,
-    payload: DecisionRequest,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """
-    Decision endpoint (Decision-first):
-    - Επιτρέπει κλήση μόνο από χρήστη του ίδιου tenant
-    - Κάνει match σε JSON ruleset (χωρίς LLM)
-    - Τρέχει actions (mock providers) και επιστρέφει structured αποτέλεσμα
-    """
+class DecisionBatchRequest(BaseModel):
+    items: List[DecisionRequest]
 
+
+class TenantRef(BaseModel):
+    id: str
+    org_type: str
+
+
+def _authorize_tenant(tenant_id: str, user: Principal) -> TenantRef:
     # 1) Authorization
     if user.tenant_id != tenant_id:
         raise HTTPException(status_code=403, detail="Forbidden: tenant access denied")
 
-    # 2) Tenant lookup (DB)
-    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
-    if not tenant:
+    # 2) Tenant (από τον cached principal => χωρίς DB query)
+    if user.org_type is None:
         raise HTTPException(status_code=404, detail="Tenant not found")
 
-    # 3) Decide based on org_type + question
-    result = decide(tenant.org_type, payload.question)
+    return TenantRef(id=tenant_id, org_type=user.org_type)
+
 
+async def _complete_result(
+    result: Dict[str, Any],
+    payload: DecisionRequest,
+    user: Principal,
+    tenant: TenantRef,
+    loader: Optional[TenantDataLoader] = None,
+) -> Dict[str, Any]:
     # 4) Build context for actions
     ctx = {
         "question": payload.question,
         "fields": payload.fields or {},
         "user": {"email": user.email, "role": user.role},
-        "tenant": {"id": tenant_id, "org_type": tenant.org_type},
+        "tenant": {"id": tenant.id, "org_type": tenant.org_type},
+        # request-scoped loader: κάθε record φέρνεται μία φορά (κοινός σε όλο το batch)
+        "loader": loader or TenantDataLoader(),
     }
 
-    # 5) Run actions + attach results
-    exec_out = run_actions(tenant_id, result.get("actions", []), ctx)
+    # 5) Run actions (στο ίδιο event loop, χωρίς threadpool slot) + attach results
+    exec_out = await run_actions_async(tenant.id, result.get("actions", []), ctx)
     result["data"] = exec_out.get("data", {})
     result["action_results"] = exec_out.get("action_results", [])
 
     # 6) Add metadata
     result.update(
         {
-            "tenant_id": tenant_id,
+            "tenant_id": tenant.id,
             "org_type": tenant.org_type,
             "requested_by": user.email,
         }
     )
 
     return result
+
+
+@router.post("/tenants/{tenant_id}/decision")
+async def decision(
+    tenant_id: str,
+    payload: DecisionRequest,
+    user: Principal = Depends(get_current_user),
+):
+    """
+    Decision endpoint (Decision-first):
+    - Επιτρέπει κλήση μόνο από χρήστη του ίδιου tenant
+    - Κάνει match σε JSON ruleset (χωρίς LLM)
+    - Τρέχει actions (mock providers) και επιστρέφει structured αποτέλεσμα
+    """
+
+    # 1) + 2) Authorization + tenant lookup
+    tenant = _authorize_tenant(tenant_id, user)
+
+    # 3) Decide based on org_type + question.
+    # Σε cache miss: φόρτωμα/compile ruleset, matching και fuzzy fallback (ms CPU)
+    # => σε thread, ώστε να μη σταματούν τα υπόλοιπα requests του worker
+    result = await asyncio.to_thread(decide, tenant.org_type, payload.question)
+
+    # 4) - 6) actions + metadata
+    return await _complete_result(result, payload, user, tenant)
+
+
+@router.post("/tenants/{tenant_id}/decision/batch")
+async def decision_batch(
+    tenant_id: str,
+    payload: DecisionBatchRequest,
+    user: Principal = Depends(get_current_user),
+):
+    """
+    Batch decision endpoint (π.χ. nightly replay αρχειοθετημένων ερωτήσεων):
+    - Ένα auth + ένα tenant lookup για όλο το batch
+    - Όλες οι ερωτήσεις γίνονται match με ένα ruleset snapshot (decide_many)
+    - Κάθε item επιστρέφει ό,τι θα επέστρεφε το single endpoint
+    - Τα actions τρέχουν για το πολύ DECISION_BATCH_CONCURRENCY items κάθε φορά
+    """
+
+    if len(payload.items) > DECISION_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {DECISION_BATCH_MAX_ITEMS} items)")
+
+    tenant = _authorize_tenant(tenant_id, user)
+
+    # CPU-bound (χιλιάδες ερωτήσεις) => εκτός event loop
+    decided = await asyncio.to_thread(decide_many, tenant.org_type, [item.question for item in payload.items])
+
+    # Ένας loader για όλο το batch + prefetch με ένα call ανά entity (blocking fetch => thread)
+    loader = TenantDataLoader()
+    await asyncio.to_thread(
+        prime_loader,
+        loader,
+        tenant.id,
+        [(result.get("actions", []), item.fields or {}) for item, result in zip(payload.items, decided)],
+    )
+
+    # Το πολύ DECISION_BATCH_CONCURRENCY items σε εξέλιξη (με τη σειρά του batch)
+    slots = asyncio.Semaphore(DECISION_BATCH_CONCURRENCY)
+
+    async def _complete(result: Dict[str, Any], item: DecisionRequest) -> Dict[str, Any]:
+        async with slots:
+            return await _complete_result(result, item, user, tenant, loader=loader)
+
+    results = await asyncio.gather(*(
+        _complete(result, item) for item, result in zip(payload.items, decided)
+    ))
+    return {"results": list(results)}
+
+
+@router.get("/decision/cache-stats")
+async def decision_cache(user: Principal = Depends(get_current_user)):
+    """
+    Counters του cache επιλογής rule (hits / misses / evictions / expirations).
+    Χρήσιμο για monitoring: πόσες ερωτήσεις γλιτώνουν το full rule scan.
+    """
+    return decision_cache_stats()
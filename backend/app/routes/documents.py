@@ -1,19 +1,44 @@
 # APIRouter: για ομαδοποίηση endpoints σχετικών με documents
 # UploadFile / File: για file uploads μέσω multipart/form-data
 # HTTPException: για σωστά HTTP errors
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
 
 # Path: ασφαλής διαχείριση paths (cross-platform)
 from pathlib import Path
 
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import asyncio
+import base64
+import binascii
 import os
 import uuid
 
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_async_db
+from app.models import Document
+from app.routes.auth import get_current_user
+from app.services.principals import Principal
+
+# Content-addressed αποθήκευση (chunked, sha256 on the fly, dedup, refcount)
+from app.services.storage import BLOB_ROOT, UPLOAD_MAX_BYTES, BlobStore, UploadTooLarge
+
+# Full-text index ανά tenant (SQLite FTS5), ενημερώνεται στο background
+from app.services import search_index
+
 
 # Router για όλα τα document-related endpoints
 router = APIRouter(tags=["documents"])
 
 
+# Επιπλέον hits που ζητάμε από το index στο search, ώστε τα ορφανά entries
+# (documents που διαγράφηκαν ενώ γινόταν indexing σε άλλο worker) να μη μικραίνουν τη σελίδα
+SEARCH_RECONCILE_SLACK = int(os.getenv("SEARCH_RECONCILE_SLACK", "5"))
+
+
 # Root directory όπου αποθηκεύονται τα uploads
 # Π.χ. uploads/<tenant_id>/<file>
 UPLOAD_ROOT = Path("uploads")
@@ -21,20 +46,52 @@ UPLOAD_ROOT = Path("uploads")
 # Δημιουργούμε τον φάκελο αν δεν υπάρχει
 UPLOAD_ROOT.mkdir(exist_ok=True)
 
+# Κάθε περιεχόμενο μία φορά στο δίσκο. Τα uploads/<tenant_id>/<file> είναι
+# αναφορές (hardlinks) στο αντίστοιχο blob.
+BLOBS = BlobStore(BLOB_ROOT)
+
 
 # -------------------------
-# MVP in-memory metadata store
+# Metadata: πίνακας `documents` (app/models.py)
 # -------------------------
-# Δομή:
-# {
-#   tenant_id: [
-#       {doc1 metadata},
-#       {doc2 metadata},
-#   ]
-# }
-#
-# ⚠️ Σε production → database (Postgres)
-DOCS = {}  # tenant_id -> list of docs
+# Μόνιμα, κοινά σε όλα τα workers, indexed στο (tenant_id, created_at, id).
+
+def _doc_out(doc: Any) -> Dict[str, Any]:
+    return {
+        "id": doc.id,                            # internal document id
+        "original_name": doc.original_name,      # όνομα όπως το ανέβασε ο χρήστης
+        "path": doc.path,                        # path στο filesystem (αναφορά στο blob)
+        "size": doc.size,                        # μέγεθος σε bytes
+        "sha256": doc.sha256,                    # checksum περιεχομένου (= κλειδί του blob)
+        "created_at": doc.created_at.isoformat(),
+    }
+
+
+# Keyset cursor: (created_at, id) του τελευταίου document της σελίδας, base64url
+def _encode_cursor(doc: Any) -> str:
+    raw = f"{doc.created_at.isoformat()}|{doc.id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, doc_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), doc_id
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _authorize_tenant(tenant_id: str, user: Principal) -> None:
+    # Μόνο χρήστες του ίδιου tenant (όπως στις decision routes)
+    if user.tenant_id != tenant_id:
+        raise HTTPException(status_code=403, detail="Forbidden: tenant access denied")
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    # Τα created_at αποθηκεύονται ως naive UTC
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
 
 # -------------------------
@@ -43,26 +100,36 @@ DOCS = {}  # tenant_id -> list of docs
 @router.post("/tenants/{tenant_id}/documents")
 async def upload_document(
     tenant_id: str,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
 ):
     """
     Ανεβάζει ένα document για συγκεκριμένο tenant.
 
     Ροή:
-    1. Έλεγχος ότι υπάρχει filename
-    2. Δημιουργία φακέλου tenant (uploads/<tenant_id>)
-    3. Δημιουργία ασφαλούς μοναδικού filename
-    4. Αποθήκευση αρχείου στο filesystem
-    5. Αποθήκευση metadata στο in-memory store
+    1. Έλεγχος ότι ο χρήστης ανήκει στον tenant
+    2. Έλεγχος ότι υπάρχει filename
+    3. Δημιουργία φακέλου tenant (uploads/<tenant_id>)
+    4. Δημιουργία ασφαλούς μοναδικού filename
+    5. Αποθήκευση αρχείου στο blob store (chunked, εκτός event loop)
+       + αναφορά του tenant. Αν το περιεχόμενο υπάρχει ήδη => μόνο η αναφορά.
+    6. Αποθήκευση metadata στον πίνακα documents
+    7. Full-text indexing στο background (το response δεν το περιμένει)
     """
 
+    _authorize_tenant(tenant_id, user)
+
     # Αν για κάποιο λόγο δεν υπάρχει filename → bad request
     if not file.filename:
         raise HTTPException(status_code=400, detail="No filename")
 
+    # Γρήγορη απόρριψη αν το μέγεθος είναι ήδη γνωστό (π.χ. από το multipart parser)
+    if file.size is not None and file.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File too large (max {UPLOAD_MAX_BYTES} bytes)")
+
     # Φάκελος tenant (ένα "sandbox" ανά οργανισμό)
     tenant_dir = UPLOAD_ROOT / tenant_id
-    tenant_dir.mkdir(parents=True, exist_ok=True)
 
     # Παίρνουμε την επέκταση του αρχείου (π.χ. .pdf, .txt)
     ext = os.path.splitext(file.filename)[1].lower()
@@ -74,24 +141,36 @@ async def upload_document(
     # Πλήρες path αποθήκευσης
     out_path = tenant_dir / safe_name
 
-    # Διαβάζουμε το περιεχόμενο του αρχείου (async)
-    content = await file.read()
+    # Hash σε chunks από το (spooled) upload, αποθήκευση blob μόνο αν είναι νέο.
+    # Blocking I/O => σε thread, ώστε το event loop να εξυπηρετεί τα υπόλοιπα requests.
+    # Μνήμη ανά upload: ένα chunk, ανεξάρτητα από το μέγεθος του αρχείου.
+    try:
+        stored = await asyncio.to_thread(BLOBS.add, file.file, out_path)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
-    # Αποθηκεύουμε το αρχείο στο filesystem
-    out_path.write_bytes(content)
+    # Αποθήκευση metadata (αν αποτύχει, αποδεσμεύουμε την αναφορά στο blob)
+    doc = Document(
+        id=safe_name,
+        tenant_id=tenant_id,
+        original_name=file.filename,
+        path=str(out_path),
+        size=stored.size,
+        sha256=stored.sha256,
+    )
+    db.add(doc)
+    try:
+        await db.commit()
+    except BaseException:
+        await asyncio.to_thread(BLOBS.release, stored.sha256, out_path)
+        raise
 
-    # Αποθήκευση metadata (MVP)
-    DOCS.setdefault(tenant_id, []).append({
-        "id": safe_name,                 # internal document id
-        "original_name": file.filename,  # όνομα όπως το ανέβασε ο χρήστης
-        "path": str(out_path),           # path στο filesystem
-        "size": len(content),            # μέγεθος σε bytes
-    })
+    search_index.INDEXER.add(tenant_id, doc.id, doc.original_name, out_path)
 
     # Επιστρέφουμε το document που μόλις ανέβηκε
     return {
         "ok": True,
-        "doc": DOCS[tenant_id][-1]
+        "doc": {**_doc_out(doc), "deduplicated": stored.deduplicated},  # True => το περιεχόμενο υπήρχε ήδη
     }
 
 
@@ -99,10 +178,138 @@ async def upload_document(
 # Λίστα documents για tenant
 # -------------------------
 @router.get("/tenants/{tenant_id}/documents")
-def list_documents(tenant_id: str):
+async def list_documents(
+    tenant_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="το next_cursor της προηγούμενης σελίδας"),
+    name: Optional[str] = Query(None, description="κομμάτι του αρχικού ονόματος (case-insensitive)"),
+    min_size: Optional[int] = Query(None, ge=0),
+    max_size: Optional[int] = Query(None, ge=0),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    """
+    Documents ενός tenant, νεότερα πρώτα, με keyset pagination:
+    => {"items": [...], "next_cursor": "..."|null}
+
+    Κάθε σελίδα είναι ένα range scan στο index (tenant_id, created_at, id),
+    άρα σταθερό κόστος ακόμα και με 100k+ documents ανά tenant (χωρίς OFFSET).
+    """
+
+    _authorize_tenant(tenant_id, user)
+
+    # Μόνο columns (χωρίς ORM objects): _doc_out δουλεύει και με Row
+    stmt = (
+        select(
+            Document.id, Document.original_name, Document.path,
+            Document.size, Document.sha256, Document.created_at,
+        )
+        .where(Document.tenant_id == tenant_id)
+        .order_by(Document.created_at.desc(), Document.id.desc())
+    )
+    if cursor:
+        stmt = stmt.where(tuple_(Document.created_at, Document.id) < tuple_(*_decode_cursor(cursor)))
+    if name:
+        # Substring match: τα %, _ του χρήστη είναι literal χαρακτήρες, όχι wildcards
+        escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(Document.original_name.ilike(f"%{escaped}%", escape="\\"))
+    if min_size is not None:
+        stmt = stmt.where(Document.size >= min_size)
+    if max_size is not None:
+        stmt = stmt.where(Document.size <= max_size)
+    if created_after is not None:
+        stmt = stmt.where(Document.created_at >= _utc_naive(created_after))
+    if created_before is not None:
+        stmt = stmt.where(Document.created_at < _utc_naive(created_before))
+
+    # limit + 1: ξέρουμε αν υπάρχει επόμενη σελίδα χωρίς επιπλέον query
+    docs = (await db.execute(stmt.limit(limit + 1))).all()
+    page = docs[:limit]
+    return {
+        "items": [_doc_out(d) for d in page],
+        "next_cursor": _encode_cursor(page[-1]) if len(docs) > limit else None,
+    }
+
+
+# -------------------------
+# Full-text αναζήτηση στα documents του tenant
+# -------------------------
+@router.get("/tenants/{tenant_id}/documents/search")
+async def search_documents(
+    tenant_id: str,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Documents του tenant που περιέχουν ΟΛΟΥΣ τους όρους του q (ο τελευταίος ως prefix),
+    ταξινομημένα κατά σχετικότητα (bm25), με snippet γύρω από τα matches:
+    => {"items": [{"doc_id", "original_name", "snippet", "score"}, ...]}
+
+    Κείμενο και query περνούν από το ίδιο Greek normalization (χωρίς τόνους / κεφαλαία),
+    άρα και τα snippets είναι σε normalized μορφή. Documents που μόλις ανέβηκαν
+    εμφανίζονται μόλις τελειώσει το background indexing τους.
     """
-    Επιστρέφει όλα τα documents που ανήκουν σε συγκεκριμένο tenant.
+
+    # Snippets = περιεχόμενο των εγγράφων: μόνο για χρήστες του tenant
+    _authorize_tenant(tenant_id, user)
+
+    # Ένα index lookup στο αρχείο του tenant: blocking sqlite3 => σε thread
+    # (με περιθώριο για hits που ίσως πετάξει το reconciliation παρακάτω)
+    items = await asyncio.to_thread(
+        search_index.search, tenant_id, q, limit + SEARCH_RECONCILE_SLACK
+    )
+
+    # Reconciliation με τον πίνακα `documents`: τα index/remove jobs έχουν σειρά μόνο
+    # μέσα σε ένα process, οπότε ένα upload σε άλλο worker μπορεί να ξαναγράψει στο
+    # index ένα document που έχει ήδη διαγραφεί. Επιστρέφουμε μόνο ό,τι υπάρχει ακόμη
+    # και καθαρίζουμε τα ορφανά entries από το index.
+    if items:
+        ids = [item["doc_id"] for item in items]
+        live = set(
+            (
+                await db.execute(
+                    select(Document.id).where(
+                        Document.tenant_id == tenant_id, Document.id.in_(ids)
+                    )
+                )
+            ).scalars()
+        )
+        for doc_id in ids:
+            if doc_id not in live:
+                search_index.INDEXER.remove(tenant_id, doc_id)
+        items = [item for item in items if item["doc_id"] in live]
+
+    return {"items": items[:limit]}
+
+
+# -------------------------
+# Διαγραφή document
+# -------------------------
+@router.delete("/tenants/{tenant_id}/documents/{doc_id}")
+async def delete_document(
+    tenant_id: str,
+    doc_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
     """
+    Σβήνει το document του tenant (metadata + αναφορά).
+    Το blob σβήνεται μόνο όταν δεν το χρησιμοποιεί κανένα άλλο document.
+    """
+
+    _authorize_tenant(tenant_id, user)
+
+    doc = await db.scalar(select(Document).where(Document.tenant_id == tenant_id, Document.id == doc_id))
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
 
-    # Αν δεν υπάρχει tenant → επιστρέφει κενή λίστα
-    return DOCS.get(tenant_id, [])
+    sha256, path = doc.sha256, Path(doc.path)
+    await db.delete(doc)
+    await db.commit()
+    search_index.INDEXER.remove(tenant_id, doc_id)
+    blob_deleted = await asyncio.to_thread(BLOBS.release, sha256, path)
+    return {"ok": True, "blob_deleted": blob_deleted}
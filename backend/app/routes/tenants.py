@@ -11,15 +11,36 @@ Tenants endpoints.
 - Να "δέσει" σωστά το frontend (λίστα tenants κλπ)
 """
 
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.db import async_session, get_async_db
 from app.models import Tenant
+from app.routes.auth import get_current_user
+from app.services.principals import Principal
+from app.services.provisioning import parse_rows, provision
 
 router = APIRouter(tags=["tenants"])
 
+# Πόσες γραμμές φέρνει ο DB cursor ανά γύρο στο streamed export
+TENANT_EXPORT_BATCH = 1000
+
+# Μέγιστες γραμμές ανά bulk provisioning αρχείο
+PROVISION_MAX_ROWS = int(os.getenv("PROVISION_MAX_ROWS", "50000"))
+
+# Ποιος ρόλος μπορεί να κάνει provisioning μέσω API (platform operator, ΟΧΙ tenant admin:
+# κάθε signup δημιουργεί admin). Δεν δίνεται ποτέ από το signup, μόνο από DB / CLI.
+# Κενό => το endpoint είναι απενεργοποιημένο (μόνο CLI).
+PROVISION_OPERATOR_ROLE = os.getenv("PROVISION_OPERATOR_ROLE", "operator").strip()
+
 
 # -------------------------
 # Pydantic model για CREATE tenant
@@ -36,23 +57,22 @@ class TenantCreate(BaseModel):
 # Δημιουργία νέου tenant (DB)
 # -------------------------
 @router.post("/tenants")
-def create_tenant(payload: TenantCreate, db: Session = Depends(get_db)):
+async def create_tenant(payload: TenantCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Δημιουργεί έναν νέο tenant (οργανισμό) και τον αποθηκεύει στη DB.
 
     Ροή:
     1) FastAPI κάνει parse/validation του JSON σε TenantCreate
     2) Δημιουργούμε ORM object Tenant
-    3) db.add + db.commit για να γραφτεί στη SQLite
-    4) db.refresh για να έχουμε τα τελικά πεδία (π.χ. id)
+    3) db.add + await db.commit για να γραφτεί στη DB (async, χωρίς threadpool)
+    4) expire_on_commit=False => τα πεδία (π.χ. id) είναι ήδη διαθέσιμα, χωρίς refresh query
     5) Επιστρέφουμε JSON-friendly dict
     """
 
     tenant = Tenant(name=payload.name, org_type=payload.org_type)
 
     db.add(tenant)
-    db.commit()
-    db.refresh(tenant)
+    await db.commit()
 
     return {
         "id": tenant.id,
@@ -62,16 +82,85 @@ def create_tenant(payload: TenantCreate, db: Session = Depends(get_db)):
 
 
 # -------------------------
-# Λίστα όλων των tenants (DB)
+# Λίστα tenants (DB)
 # -------------------------
+def _tenants_query(org_type: Optional[str]) -> Select:
+    # Μόνο columns (χωρίς ORM objects), πάντα ταξινομημένα στο id (keyset cursor)
+    stmt = select(Tenant.id, Tenant.name, Tenant.org_type).order_by(Tenant.id)
+    if org_type:
+        stmt = stmt.where(Tenant.org_type == org_type)
+    return stmt
+
+
+async def _stream_tenants(org_type: Optional[str]) -> AsyncIterator[str]:
+    """
+    JSON array γραμμή-γραμμή από server-side cursor: σταθερή μνήμη όσοι tenants κι αν υπάρχουν.
+    Δικό του session: ζει όσο το streaming, ανεξάρτητα από τα request dependencies.
+    """
+    async with async_session() as db:
+        result = await db.stream(_tenants_query(org_type).execution_options(yield_per=TENANT_EXPORT_BATCH))
+        first = True
+        yield "["
+        async for rows in result.partitions():
+            chunk = ",".join(json.dumps({"id": r.id, "name": r.name, "org_type": r.org_type}) for r in rows)
+            yield chunk if first else "," + chunk
+            first = False
+        yield "]"
+
+
 @router.get("/tenants")
-def list_tenants(db: Session = Depends(get_db)):
+async def list_tenants(
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="μέγεθος σελίδας (χωρίς limit => streamed export)"),
+    after: Optional[str] = Query(None, description="cursor: το next_cursor της προηγούμενης σελίδας"),
+    org_type: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Επιστρέφει όλους τους tenants από τη DB.
+    Επιστρέφει tenants από τη DB.
+
+    - Με `limit`: keyset pagination στο id => {"items": [...], "next_cursor": "..."|null}
+      (σταθερό κόστος ανά σελίδα, χωρίς OFFSET)
+    - Χωρίς `limit`: ΟΛΟΙ οι tenants ως streamed JSON array (admin export)
+    - `org_type`: φίλτρο (indexed)
     """
 
-    tenants = db.query(Tenant).all()
-    return [
-        {"id": t.id, "name": t.name, "org_type": t.org_type}
-        for t in tenants
-    ]
+    if limit is None:
+        return StreamingResponse(_stream_tenants(org_type), media_type="application/json")
+
+    stmt = _tenants_query(org_type)
+    if after:
+        stmt = stmt.where(Tenant.id > after)
+
+    # limit + 1: ξέρουμε αν υπάρχει επόμενη σελίδα χωρίς επιπλέον query
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    page = rows[:limit]
+    return {
+        "items": [{"id": r.id, "name": r.name, "org_type": r.org_type} for r in page],
+        "next_cursor": page[-1].id if len(rows) > limit else None,
+    }
+
+
+# -------------------------
+# Bulk provisioning (tenants + users από αρχείο)
+# -------------------------
+@router.post("/tenants/provision")
+async def provision_tenants(
+    file: UploadFile = File(...),
+    user: Principal = Depends(get_current_user),
+):
+    """
+    CSV/JSON με γραμμές tenant,org_name,org_type,email,password,role (βλ. services/provisioning.py).
+    Παράλληλο hashing + ένα transaction. Επιστρέφει report με errors ανά γραμμή.
+    """
+    if not PROVISION_OPERATOR_ROLE or user.role != PROVISION_OPERATOR_ROLE:
+        raise HTTPException(status_code=403, detail="Forbidden: platform operators only")
+
+    try:
+        rows = parse_rows(await file.read(), file.filename or "")
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid provisioning file: {e}")
+    if len(rows) > PROVISION_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Too many rows (max {PROVISION_MAX_ROWS})")
+
+    # hashing + inserts είναι blocking => εκτός event loop
+    return await asyncio.to_thread(provision, rows)
@@ -5,62 +5,99 @@ Action runner: εκτελεί actions που επιστρέφει ο rule engine
 
 Οι κανόνες (JSON) λένε *τι* actions χρειάζονται.
 Οι action handlers (Python) υλοποιούν *πώς* τα κάνουμε (DB, APIs, κλπ).
+
+Κάθε action δηλώνει τι δεδομένα παράγει (produces) και τι διαβάζει (consumes)
+από το runtime_data. Ο runner φτιάχνει DAG και τρέχει ταυτόχρονα όσα actions
+δεν εξαρτώνται μεταξύ τους (π.χ. check_student_status || check_financial_clearance).
+
+Handlers μπορεί να είναι sync functions ή coroutines (async def).
+Κάθε action έχει timeout: αν το ξεπεράσει, γράφεται ως error στα action_results
+και το response συνεχίζει με ό,τι άλλο ολοκληρώθηκε (partial results).
+
+Τα δεδομένα του tenant διαβάζονται μέσω του ctx["loader"] (TenantDataLoader):
+κάθε record φέρνεται μία φορά ανά request, όσα actions κι αν το ζητήσουν.
 """
 
-from typing import Any, Dict, List, Callable, TypedDict
-from app.services.mock_db import get_tenant_db
+import asyncio
+import inspect
+import os
+import threading
+from collections.abc import Hashable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, List, Callable, Optional, Set, Tuple, TypedDict, Union
+from app.services.dataloader import TenantDataLoader
 
 class ActionOutput(TypedDict, total=False):
     ok: bool
     data: Dict[str, Any]
     error: str
 
-ActionFn = Callable[[str, Dict[str, Any]], ActionOutput]
+# sync handler ή coroutine function (async def)
+ActionFn = Callable[[str, Dict[str, Any]], Union[ActionOutput, Awaitable[ActionOutput]]]
+
+class ActionSpec(TypedDict, total=False):
+    produces: Tuple[str, ...]  # keys που γράφει στο runtime_data
+    consumes: Tuple[str, ...]  # keys που διαβάζει από το runtime_data
+    timeout: float             # seconds (default: ACTION_TIMEOUT_SECONDS, <= 0 => χωρίς όριο)
+    loads: Tuple[str, ...]     # tenant entities που διαβάζει ανά fields.student_id (για prefetch)
+
+# Threads για sync actions (I/O bound: DB, APIs)
+ACTION_WORKERS = int(os.getenv("ACTION_WORKERS", "16"))
+_EXECUTOR = ThreadPoolExecutor(max_workers=ACTION_WORKERS, thread_name_prefix="action")
+
+# Default timeout ανά action
+ACTION_TIMEOUT_SECONDS = float(os.getenv("ACTION_TIMEOUT_SECONDS", "5"))
 
 def _need_student_id(ctx: Dict[str, Any]) -> str | None:
     return (ctx.get("fields") or {}).get("student_id")
 
+def _loader(ctx: Dict[str, Any]) -> TenantDataLoader:
+    # Οι routes βάζουν έναν loader ανά request. Fallback για callers χωρίς loader.
+    loader = ctx.get("loader")
+    if loader is None:
+        loader = ctx["loader"] = TenantDataLoader()
+    return loader
+
 def action_check_student_status(tenant_id: str, ctx: Dict[str, Any]) -> ActionOutput:
-    db = get_tenant_db(tenant_id)
     student_id = _need_student_id(ctx)
     if not student_id:
         return {"ok": False, "error": "Missing fields.student_id"}
 
-    student = db["students"].get(student_id)
+    student = _loader(ctx).load(tenant_id, "students", student_id)
     if not student:
         return {"ok": False, "error": f"Student not found: {student_id}"}
 
     return {"ok": True, "data": {"student": {"id": student_id, **student}}}
 
 def action_check_financial_clearance(tenant_id: str, ctx: Dict[str, Any]) -> ActionOutput:
-    db = get_tenant_db(tenant_id)
     student_id = _need_student_id(ctx)
     if not student_id:
         return {"ok": False, "error": "Missing fields.student_id"}
 
-    fin = db["finance"].get(student_id, {"balance_eur": 0})
+    fin = _loader(ctx).load(tenant_id, "finance", student_id, {"balance_eur": 0})
     is_clear = fin.get("balance_eur", 0) <= 0
 
     return {"ok": True, "data": {"finance": fin, "is_financially_clear": is_clear}}
 
 def action_get_absences(tenant_id: str, ctx: Dict[str, Any]) -> ActionOutput:
-    db = get_tenant_db(tenant_id)
     student_id = _need_student_id(ctx)
     if not student_id:
         return {"ok": False, "error": "Missing fields.student_id"}
 
-    abs_info = db["absences"].get(student_id, {"total": 0})
+    abs_info = _loader(ctx).load(tenant_id, "absences", student_id, {"total": 0})
     return {"ok": True, "data": {"absences": abs_info}}
 
 def action_check_absence_limits(tenant_id: str, ctx: Dict[str, Any]) -> ActionOutput:
-    db = get_tenant_db(tenant_id)
     absences = (ctx.get("runtime_data") or {}).get("absences", {})
     total = absences.get("total")
 
     if total is None:
         return {"ok": False, "error": "Absences not loaded yet (run get_absences first)"}
 
-    limit = db["limits"]["max_absences"]
+    limit = _loader(ctx).load(tenant_id, "limits", "max_absences")
+    if limit is None:
+        return {"ok": False, "error": "Missing limits.max_absences"}
+
     over_limit = total >= limit
     return {"ok": True, "data": {"absence_limit": limit, "over_absence_limit": over_limit}}
 
@@ -72,33 +109,190 @@ ACTIONS: Dict[str, ActionFn] = {
     "check_absence_limits": action_check_absence_limits,
 }
 
-def run_actions(tenant_id: str, action_names: List[str], ctx: Dict[str, Any]) -> Dict[str, Any]:
+# Dataflow: τι παράγει / τι χρειάζεται κάθε action.
+# Action χωρίς spec θεωρείται ότι μπορεί να διαβάζει/γράφει οτιδήποτε
+# (τρέχει μετά από όλα τα προηγούμενα και πριν από όλα τα επόμενα).
+ACTION_SPECS: Dict[str, ActionSpec] = {
+    "check_student_status": {"produces": ("student",), "consumes": (), "loads": ("students",)},
+    "check_financial_clearance": {"produces": ("finance", "is_financially_clear"), "consumes": (), "loads": ("finance",)},
+    "get_absences": {"produces": ("absences",), "consumes": (), "loads": ("absences",)},
+    "check_absence_limits": {"produces": ("absence_limit", "over_absence_limit"), "consumes": ("absences",)},
+}
+
+def prime_loader(loader: TenantDataLoader, tenant_id: str, jobs: List[Tuple[List[str], Dict[str, Any]]]) -> None:
+    """
+    Batch prefetch για πολλά (action_names, fields) μαζί (π.χ. batch decision endpoint):
+    ένα backend call ανά entity για όλα τα student_ids όλων των items.
+    """
+    # dict ως ordered set: τα fields είναι free-form (str / int / ...), χωρίς sort
+    wanted: Dict[str, Dict[Any, None]] = {}
+    for action_names, fields in jobs:
+        student_id = (fields or {}).get("student_id")
+        if not student_id or not isinstance(student_id, Hashable):
+            continue
+        for name in action_names:
+            for entity in (ACTION_SPECS.get(name) or {}).get("loads", ()):
+                wanted.setdefault(entity, {})[student_id] = None
+
+    for entity, keys in wanted.items():
+        loader.prime(tenant_id, entity, list(keys))
+
+def _plan(action_names: List[str]) -> List[Set[int]]:
+    """
+    deps[i] = indexes προηγούμενων (στη λίστα) actions από τα οποία εξαρτάται το i.
+    Εξαρτήσεις μόνο προς τα πίσω => ίδια σημασιολογία με την εκτέλεση με σειρά.
+    """
+    deps: List[Set[int]] = []
+    for i, name in enumerate(action_names):
+        if name not in ACTIONS:
+            deps.append(set())  # unknown action: δεν τρέχει καν
+            continue
+
+        spec = ACTION_SPECS.get(name)
+        d: Set[int] = set()
+        for j in range(i):
+            prev = action_names[j]
+            if prev not in ACTIONS:
+                continue
+            prev_spec = ACTION_SPECS.get(prev)
+            if spec is None or prev_spec is None:
+                d.add(j)
+            elif set(spec.get("consumes", ())) & set(prev_spec.get("produces", ())):
+                d.add(j)
+        deps.append(d)
+    return deps
+
+def _action_timeout(name: str) -> float:
+    spec = ACTION_SPECS.get(name) or {}
+    return float(spec.get("timeout", ACTION_TIMEOUT_SECONDS))
+
+async def _call_action(name: str, tenant_id: str, ctx: Dict[str, Any]) -> ActionOutput:
+    """
+    Τρέχει ένα action με timeout:
+    - coroutine handler => await στο event loop
+    - sync handler => στο _EXECUTOR (δεν μπλοκάρει το loop)
+    Το timeout μετράει από τη στιγμή που ο handler αρχίζει να τρέχει: ο χρόνος στην
+    ουρά του _EXECUTOR (π.χ. πίσω από ένα μεγάλο batch) δεν είναι αργό integration.
+    Σε timeout το sync thread δεν "σκοτώνεται" (Python), απλώς δεν το περιμένουμε.
+    """
+    fn = ACTIONS[name]
+    timeout = _action_timeout(name)
+
+    if inspect.iscoroutinefunction(fn):
+        pending: Awaitable[Any] = fn(tenant_id, ctx)
+    else:
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def _mark_started() -> None:
+            if not started.done():
+                started.set_result(None)
+
+        def _worker() -> Any:
+            loop.call_soon_threadsafe(_mark_started)
+            return fn(tenant_id, ctx)
+
+        pending = loop.run_in_executor(_EXECUTOR, _worker)
+        # Αναμονή για ελεύθερο thread: χωρίς timeout
+        await asyncio.wait({started, pending}, return_when=asyncio.FIRST_COMPLETED)
+        started.cancel()
+
+    async def _run() -> ActionOutput:
+        out = await pending
+        if inspect.isawaitable(out):  # sync wrapper που επιστρέφει coroutine
+            out = await out
+        return out
+
+    try:
+        if timeout > 0:
+            return await asyncio.wait_for(_run(), timeout)
+        return await _run()
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"Action timed out after {timeout:g}s"}
+
+async def run_actions_async(tenant_id: str, action_names: List[str], ctx: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Εκτελεί actions με σειρά.
+    Εκτελεί actions ως DAG (ανεξάρτητα actions παράλληλα), με timeout ανά action.
     Μαζεύει:
-    - action_results: status ανά action
-    - data: merged data από actions
+    - action_results: status ανά action (με τη σειρά της λίστας)
+    - data: merged data από actions (με τη σειρά της λίστας)
 
     Επιπλέον κρατά runtime_data στο ctx για να μπορεί ένα action να βασιστεί σε προηγούμενο.
     """
-    results: List[Dict[str, Any]] = []
-    merged_data: Dict[str, Any] = {}
-
     ctx.setdefault("runtime_data", {})  # για chaining μεταξύ actions
+    ctx.setdefault("loader", TenantDataLoader())  # κοινός για όλα τα actions του request
+    initial_runtime = dict(ctx["runtime_data"])
 
-    for name in action_names:
-        fn = ACTIONS.get(name)
-        if not fn:
-            results.append({"name": name, "ok": False, "error": "Unknown action"})
-            continue
+    deps = _plan(action_names)
+    outs: List[Optional[ActionOutput]] = [None] * len(action_names)
+    done: Set[int] = set()
 
-        out = fn(tenant_id, ctx)
-        ok = bool(out.get("ok"))
-        results.append({"name": name, **out})
+    def view(i: int) -> Dict[str, Any]:
+        # runtime_data όπως θα ήταν με σειριακή εκτέλεση για ό,τι δηλώνει στο consumes:
+        # όλα τα (ολοκληρωμένα) προηγούμενα outputs, με τη σειρά της λίστας
+        runtime = dict(initial_runtime)
+        for j in range(i):
+            out = outs[j]
+            if out and out.get("ok") and isinstance(out.get("data"), dict):
+                runtime.update(out["data"])
+        return {**ctx, "runtime_data": runtime}
+
+    pending = set(range(len(action_names)))
+    for i in list(pending):
+        if action_names[i] not in ACTIONS:
+            outs[i] = {"ok": False, "error": "Unknown action"}
+            pending.discard(i)
+            done.add(i)
+
+    running: Dict["asyncio.Task[ActionOutput]", int] = {}
+    while pending or running:
+        ready = sorted(i for i in pending if deps[i] <= done)
+        pending.difference_update(ready)
 
-        if ok and isinstance(out.get("data"), dict):
+        for i in ready:
+            task = asyncio.ensure_future(_call_action(action_names[i], tenant_id, view(i)))
+            running[task] = i
+
+        finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            i = running.pop(task)
+            outs[i] = task.result()
+            done.add(i)
+
+    results: List[Dict[str, Any]] = []
+    merged_data: Dict[str, Any] = {}
+    for name, out in zip(action_names, outs):
+        out = out or {}
+        results.append({"name": name, **out})
+        if out.get("ok") and isinstance(out.get("data"), dict):
             merged_data.update(out["data"])
             # runtime_data κρατάει τα τελευταία δεδομένα για chaining
             ctx["runtime_data"].update(out["data"])
 
     return {"data": merged_data, "action_results": results}
+
+# Ένα background event loop για τους sync callers (π.χ. sync routes στο threadpool):
+# τα async actions όλων των requests μοιράζονται αυτό το loop.
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+def _actions_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="actions-loop", daemon=True).start()
+            _LOOP = loop
+        return _LOOP
+
+def run_actions(tenant_id: str, action_names: List[str], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sync εκδοχή του run_actions_async (ίδιο αποτέλεσμα).
+    Για async callers προτιμάμε απευθείας `await run_actions_async(...)`.
+    """
+    if not action_names:
+        ctx.setdefault("runtime_data", {})
+        return {"data": {}, "action_results": []}
+
+    fut = asyncio.run_coroutine_threadsafe(run_actions_async(tenant_id, action_names, ctx), _actions_loop())
+    return fut.result()
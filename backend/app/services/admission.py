@@ -0,0 +1,279 @@
+"""
+admission.py
+
+Admission control / load shedding για τα "βαριά" endpoints (decision).
+
+Χωρίς αυτό, σε burst τα requests μαζεύονται στο threadpool μέχρι να κάνουν
+όλα timeout. Εδώ κάθε request περνά από ένα gate ΠΡΙΝ φτάσει στο route:
+- bounded concurrency ανά route (σύνολο) και ανά tenant
+- μικρή FIFO ουρά αναμονής με deadline
+- γρήγορη απόρριψη:
+    429 => ο tenant έχει ήδη γεμίσει το δικό του μερίδιο (running + waiting)
+    503 => το route είναι γεμάτο (ουρά πλήρης ή έληξε το deadline αναμονής)
+
+Ένας "θορυβώδης" tenant φτάνει μόνο μέχρι το per-tenant όριο του, οπότε
+δεν μπορεί να πιάσει όλα τα slots / όλη την ουρά εις βάρος των άλλων.
+
+Το μερίδιο ενός tenant το χρεώνονται ΜΟΝΟ requests με έγκυρο token (signature + exp,
+χωρίς DB) για τον tenant του URL. Όλα τα υπόλοιπα (χωρίς / άκυρο token, token άλλου
+tenant) μοιράζονται ένα κοινό "anonymous" bucket: ένα flood χωρίς credentials στο
+/tenants/<victim>/decision δεν τρώει το μερίδιο των πραγματικών users του victim.
+
+Όλη η λογική τρέχει πάνω στο event loop (ένα loop ανά process), άρα δεν
+χρειάζονται locks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Pattern, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.services import tokens
+
+# Bucket για requests χωρίς έγκυρο token του tenant (δεν μπορεί να συγκρουστεί με tenant id: έχει "/")
+ANONYMOUS_BUCKET = "anonymous/"
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+# -------------------------
+# Gate
+# -------------------------
+@dataclass(eq=False)
+class _Waiter:
+    tenant: str
+    future: asyncio.Future
+    granted: bool = field(default=False)
+
+
+class AdmissionGate:
+    """
+    Concurrency gate για ένα route.
+
+    - max_concurrency: πόσα requests τρέχουν ταυτόχρονα (όλοι οι tenants)
+    - tenant_concurrency: πόσα requests τρέχουν ταυτόχρονα ανά tenant
+    - tenant_queue: πόσα requests ενός tenant μπορούν να περιμένουν (μετά => 429)
+    - max_queue: συνολικό μέγεθος ουράς (μετά => 503)
+    - queue_timeout: δευτερόλεπτα αναμονής στην ουρά (μετά => 503)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        tenant_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        tenant_queue: Optional[int] = None,
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.tenant_concurrency = max(1, min(tenant_concurrency, self.max_concurrency))
+        self.max_queue = max(0, max_queue)
+        self.tenant_queue = self.tenant_concurrency if tenant_queue is None else max(0, tenant_queue)
+        self.queue_timeout = queue_timeout
+
+        self.running = 0
+        self._tenant_running: Dict[str, int] = {}
+        self._tenant_waiting: Dict[str, int] = {}
+        self._waiters: Deque[_Waiter] = deque()
+
+        self.admitted = 0
+        self.queued = 0
+        self.shed_tenant = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    def _can_run(self, tenant: str) -> bool:
+        return self.running < self.max_concurrency and self._tenant_running.get(tenant, 0) < self.tenant_concurrency
+
+    def _start(self, tenant: str) -> None:
+        self.running += 1
+        self._tenant_running[tenant] = self._tenant_running.get(tenant, 0) + 1
+        self.admitted += 1
+
+    def _unwait(self, waiter: _Waiter) -> None:
+        left = self._tenant_waiting[waiter.tenant] - 1
+        if left:
+            self._tenant_waiting[waiter.tenant] = left
+        else:
+            del self._tenant_waiting[waiter.tenant]
+
+    async def acquire(self, tenant: str) -> Optional[Tuple[int, str]]:
+        """
+        Περιμένει για slot. Επιστρέφει None όταν το request μπορεί να τρέξει
+        (και ΠΡΕΠΕΙ να ακολουθήσει release), αλλιώς (status_code, detail).
+        """
+        # Αν υπάρχει ελεύθερο slot, οι waiters (αν υπάρχουν) είναι μπλοκαρισμένοι
+        # από το δικό τους per-tenant όριο, οπότε δεν τους "προσπερνάμε" άδικα.
+        if self._can_run(tenant):
+            self._start(tenant)
+            return None
+
+        if self._tenant_waiting.get(tenant, 0) >= self.tenant_queue:
+            self.shed_tenant += 1
+            return 429, "Too many concurrent requests for this tenant"
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            return 503, "Server busy, retry shortly"
+
+        waiter = _Waiter(tenant, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._tenant_waiting[tenant] = self._tenant_waiting.get(tenant, 0) + 1
+        self.queued += 1
+
+        try:
+            await asyncio.wait((waiter.future,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # client έφυγε όσο περίμενε
+            if waiter.granted:
+                self.release(tenant)
+            else:
+                self._waiters.remove(waiter)
+                self._unwait(waiter)
+            raise
+
+        if waiter.granted:
+            return None
+
+        self._waiters.remove(waiter)
+        self._unwait(waiter)
+        waiter.future.cancel()
+        self.shed_timeout += 1
+        return 503, "Server busy, retry shortly"
+
+    def release(self, tenant: str) -> None:
+        self.running -= 1
+        left = self._tenant_running[tenant] - 1
+        if left:
+            self._tenant_running[tenant] = left
+        else:
+            del self._tenant_running[tenant]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        # FIFO, αλλά προσπερνάμε waiters που ο tenant τους είναι ήδη στο όριο
+        if not self._waiters or self.running >= self.max_concurrency:
+            return
+        for waiter in list(self._waiters):
+            if self.running >= self.max_concurrency:
+                break
+            if self._tenant_running.get(waiter.tenant, 0) >= self.tenant_concurrency:
+                continue
+            self._waiters.remove(waiter)
+            self._unwait(waiter)
+            self._start(waiter.tenant)
+            waiter.granted = True
+            waiter.future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "tenant_concurrency": self.tenant_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "active_tenants": len(self._tenant_running),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": {
+                "tenant_limit": self.shed_tenant,
+                "queue_full": self.shed_queue_full,
+                "queue_timeout": self.shed_timeout,
+            },
+        }
+
+
+# -------------------------
+# Routing
+# -------------------------
+@dataclass(frozen=True)
+class AdmissionRule:
+    method: str
+    pattern: Pattern[str]  # πρέπει να έχει named group "tenant"
+    gate: AdmissionGate
+
+
+def default_rules(api_prefix: str) -> List[AdmissionRule]:
+    """Gates από env (ADMISSION_DECISION_*). Single + batch decision μοιράζονται το ίδιο gate."""
+    decision = AdmissionGate(
+        "decision",
+        max_concurrency=_env_int("ADMISSION_DECISION_CONCURRENCY", 32),
+        tenant_concurrency=_env_int("ADMISSION_DECISION_TENANT_CONCURRENCY", 8),
+        max_queue=_env_int("ADMISSION_DECISION_QUEUE", 64),
+        queue_timeout=_env_int("ADMISSION_DECISION_QUEUE_TIMEOUT_MS", 250) / 1000.0,
+    )
+    pattern = re.compile(rf"^{re.escape(api_prefix)}/tenants/(?P<tenant>[^/]+)/decision(?:/batch)?$")
+    return [AdmissionRule("POST", pattern, decision)]
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware (χωρίς BaseHTTPMiddleware overhead).
+    Requests που δεν ταιριάζουν σε κανένα rule περνάνε αυτούσια.
+    """
+
+    def __init__(self, app, rules: List[AdmissionRule]):
+        self.app = app
+        self.rules = rules
+
+    @staticmethod
+    def _bucket(scope, tenant: str) -> str:
+        """tenant αν το request έχει έγκυρο bearer token γι' αυτόν, αλλιώς ANONYMOUS_BUCKET."""
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    break
+                try:
+                    claims = tokens.decode(token.strip())
+                except ValueError:
+                    break
+                if claims.get("tenant_id") == tenant:
+                    return tenant
+                break
+        return ANONYMOUS_BUCKET
+
+    def _match(self, scope) -> Optional[Tuple[AdmissionGate, str]]:
+        method, path = scope.get("method"), scope.get("path", "")
+        for rule in self.rules:
+            if rule.method == method:
+                m = rule.pattern.match(path)
+                if m:
+                    return rule.gate, m.group("tenant")
+        return None
+
+    async def __call__(self, scope, receive, send):
+        match = self._match(scope) if scope["type"] == "http" else None
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+
+        gate, tenant = match
+        # Πριν από το route: μόνο φθηνός έλεγχος token (HMAC), το πλήρες auth γίνεται στο route
+        tenant = self._bucket(scope, tenant)
+        rejected = await gate.acquire(tenant)
+        if rejected is not None:
+            status_code, detail = rejected
+            response = JSONResponse({"detail": detail}, status_code=status_code, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(tenant)
+
+
+def admission_stats(rules: List[AdmissionRule]) -> Dict[str, Any]:
+    """Queue depth / shed counters ανά gate (για monitoring)."""
+    return {rule.gate.name: rule.gate.stats() for rule in rules}
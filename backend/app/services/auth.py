@@ -1,10 +1,16 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+import asyncio
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import multiprocessing
 import os
+import threading
+import time
 
-from jose import jwt, JWTError
 from passlib.context import CryptContext
 
+from app.services import tokens
+
 
 # -------------------------
 # JWT settings
@@ -14,7 +20,8 @@ from passlib.context import CryptContext
 SECRET_KEY = os.getenv("SECRET_KEY", "CHANGE_ME_SUPER_SECRET")
 
 # HS256: συμμετρικό signing (ίδιο secret για sign/verify)
-ALGORITHM = "HS256"
+# Keyring / rotation (JWT_KEYS, JWT_ACTIVE_KID): βλ. services/tokens.py
+ALGORITHM = tokens.ALGORITHM
 
 # default διάρκεια access token (12 ώρες)
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", str(60 * 12)))
@@ -23,23 +30,181 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", str(6
 # -------------------------
 # Password hashing
 # -------------------------
-# bcrypt: ασφαλές hashing για passwords (όχι encryption)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Argon2 cost parameters (αν δεν οριστούν => passlib defaults)
+# ARGON2_TIME_COST: iterations, ARGON2_MEMORY_COST: KiB, ARGON2_PARALLELISM: lanes
+_ARGON2_SETTINGS = {
+    f"argon2__{name}": int(os.environ[env])
+    for name, env in (
+        ("time_cost", "ARGON2_TIME_COST"),
+        ("memory_cost", "ARGON2_MEMORY_COST"),
+        ("parallelism", "ARGON2_PARALLELISM"),
+    )
+    if os.getenv(env)
+}
+
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto", **_ARGON2_SETTINGS)
+
+# Το Argon2 είναι CPU-heavy: τρέχει σε ξεχωριστά processes ώστε ένα login storm
+# να μην τρώει CPU/threadpool από τα decision requests.
+# PASSWORD_HASH_WORKERS=0 => inline (χωρίς pool, π.χ. για dev/tests)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Πόσα jobs επιπλέον των workers μπορούν να περιμένουν στην ουρά πριν απορρίψουμε (503)
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", str(PASSWORD_HASH_WORKERS * 4)))
+# Bulk hashing (provisioning): passwords ανά job => λιγότερο IPC overhead
+PASSWORD_HASH_BULK_CHUNK = int(os.getenv("PASSWORD_HASH_BULK_CHUNK", "16"))
+# Πόσοι workers μπορούν να κάνουν bulk hashing ταυτόχρονα (για ΟΛΑ τα provisioning calls):
+# τουλάχιστον ένας μένει πάντα ελεύθερος για logins/signups
+PASSWORD_HASH_BULK_WORKERS = max(
+    1, int(os.getenv("PASSWORD_HASH_BULK_WORKERS", str(PASSWORD_HASH_WORKERS - 1)))
+)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Η ουρά του password hashing pool είναι γεμάτη (=> 503 στις routes)."""
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(p) for p in passwords]
+
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+_IN_FLIGHT = 0
+_BULK_SLOTS = threading.BoundedSemaphore(PASSWORD_HASH_BULK_WORKERS)
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: τα child processes δεν κληρονομούν threads/locks του API process
+            _POOL = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _POOL
+
+
+def _release(_fut: Future) -> None:
+    global _IN_FLIGHT
+    with _POOL_LOCK:
+        _IN_FLIGHT -= 1
+
+
+def submit_password_job(fn, *args) -> Future:
+    """
+    Στέλνει hash/verify στο process pool.
+    Αν running + queued >= workers + max_queue => PasswordHasherBusy (fail fast).
+    """
+    global _IN_FLIGHT
+    pool = _pool()
+    with _POOL_LOCK:
+        if _IN_FLIGHT >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+            raise PasswordHasherBusy("Password hashing queue is full")
+        _IN_FLIGHT += 1
+    try:
+        fut = pool.submit(fn, *args)
+    except Exception:
+        _release(None)
+        raise
+    fut.add_done_callback(_release)
+    return fut
+
+
+def password_pool_stats() -> Dict[str, Any]:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "in_flight": _IN_FLIGHT,
+        "bulk_workers": PASSWORD_HASH_BULK_WORKERS,
+    }
 
 
 def hash_password(password: str) -> str:
     """
-    Παίρνει plain password και επιστρέφει bcrypt hash.
-    Το hash αποθηκεύεται στη DB (ή τώρα στο USERS dict).
+    Παίρνει plain password και επιστρέφει Argon2 hash.
+    Το hash αποθηκεύεται στη DB.
     """
-    return pwd_context.hash(password)
+    if PASSWORD_HASH_WORKERS <= 0:
+        return _hash(password)
+    return submit_password_job(_hash, password).result()
 
 
 def verify_password(plain: str, hashed: str) -> bool:
     """
     Ελέγχει αν το plain password ταιριάζει με το stored hash.
     """
-    return pwd_context.verify(plain, hashed)
+    if PASSWORD_HASH_WORKERS <= 0:
+        return _verify(plain, hashed)
+    return submit_password_job(_verify, plain, hashed).result()
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Bulk hashing (π.χ. provisioning χιλιάδων users), παράλληλα στους workers.
+    Το πολύ PASSWORD_HASH_BULK_WORKERS chunks σε πτήση συνολικά (κοινό όριο για όλα
+    τα ταυτόχρονα bulk calls), ώστε τα logins να έχουν πάντα ελεύθερο worker.
+    Με ένα μόνο worker τα chunks είναι ενός password: ένα login περιμένει το πολύ ένα hash.
+    """
+    if PASSWORD_HASH_WORKERS <= 0:
+        return _hash_many(passwords)
+
+    step = max(1, PASSWORD_HASH_BULK_CHUNK if PASSWORD_HASH_WORKERS > 1 else 1)
+    chunks = [passwords[i:i + step] for i in range(0, len(passwords), step)]
+    results: List[List[str]] = [[] for _ in chunks]
+    in_flight: Dict[Future, int] = {}
+    next_chunk = 0
+
+    def _release_slot(_fut: Future) -> None:
+        _BULK_SLOTS.release()
+
+    while next_chunk < len(chunks) or in_flight:
+        while next_chunk < len(chunks):
+            # χωρίς δικά μας chunks σε πτήση περιμένουμε slot, αλλιώς μαζεύουμε πρώτα αποτελέσματα
+            acquired = _BULK_SLOTS.acquire(blocking=False) if in_flight else _BULK_SLOTS.acquire(timeout=0.05)
+            if not acquired:
+                if in_flight:
+                    break
+                continue
+            try:
+                fut = submit_password_job(_hash_many, chunks[next_chunk])
+            except PasswordHasherBusy:
+                _BULK_SLOTS.release()
+                if in_flight:
+                    break
+                time.sleep(0.05)  # γεμάτο από άλλους (logins): ξαναδοκιμάζουμε
+                continue
+            fut.add_done_callback(_release_slot)
+            in_flight[fut] = next_chunk
+            next_chunk += 1
+
+        if in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                results[in_flight.pop(fut)] = fut.result()
+
+    return [h for chunk in results for h in chunk]
+
+
+# Async εκδοχές για async routes: το event loop δεν μπλοκάρει ποτέ στο Argon2
+async def hash_password_async(password: str) -> str:
+    if PASSWORD_HASH_WORKERS <= 0:
+        return await asyncio.to_thread(_hash, password)
+    return await asyncio.wrap_future(submit_password_job(_hash, password))
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    if PASSWORD_HASH_WORKERS <= 0:
+        return await asyncio.to_thread(_verify, plain, hashed)
+    return await asyncio.wrap_future(submit_password_job(_verify, plain, hashed))
 
 
 # -------------------------
@@ -62,8 +227,8 @@ def create_access_token(data: Dict[str, Any], expires_minutes: int = ACCESS_TOKE
     # exp claim: το standard JWT expiration field
     to_encode.update({"exp": expire})
 
-    # encode/sign
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # encode/sign με το active key του keyring (kid στο header)
+    return tokens.encode(to_encode)
 
 
 def decode_token(token: str) -> Dict[str, Any]:
@@ -71,11 +236,8 @@ def decode_token(token: str) -> Dict[str, Any]:
     Κάνει verify + decode το JWT.
     Αν είναι invalid/expired → πετάει ValueError.
     """
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError as e:
-        # JWTError καλύπτει:
-        # - invalid signature
-        # - expired token
-        # - malformed token
-        raise ValueError("Invalid token") from e
+    # tokens.InvalidToken (υποκλάση ValueError) καλύπτει:
+    # - invalid signature / άγνωστο ή retired kid
+    # - expired token
+    # - malformed token
+    return tokens.decode(token)
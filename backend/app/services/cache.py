@@ -0,0 +1,106 @@
+"""
+cache.py
+
+Μικρό, thread-safe in-memory cache με:
+- bounded μέγεθος (LRU eviction)
+- TTL ανά entry
+- counters (hits / misses / evictions / expirations) για monitoring
+
+Χρησιμοποιείται από services που θέλουν να γλιτώσουν επαναλαμβανόμενη δουλειά
+ανά request (π.χ. rule selection στον decision engine).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[V]):
+    """
+    LRU + TTL cache.
+
+    - maxsize: μέγιστος αριθμός entries (το λιγότερο πρόσφατο φεύγει πρώτο)
+    - ttl: δευτερόλεπτα ζωής κάθε entry (<= 0 => χωρίς λήξη)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = max(0, int(maxsize))
+        self.ttl = float(ttl)
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = item
+            if expires_at and expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        if self.maxsize == 0:
+            return
+
+        expires_at = self._clock() + self.ttl if self.ttl > 0 else 0.0
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (expires_at, value)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_if(self, predicate: Callable[[Hashable, V], bool]) -> int:
+        """Αφαιρεί όσα entries ταιριάζουν στο predicate(key, value). Επιστρέφει πόσα."""
+        with self._lock:
+            doomed = [k for k, (_exp, v) in self._data.items() if predicate(k, v)]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
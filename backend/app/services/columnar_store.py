@@ -0,0 +1,358 @@
+"""
+columnar_store.py
+
+Compact, memory-mapped columnar αρχείο ανά tenant για μεγάλα datasets (100k+ students).
+
+Αντί για nested dicts (εκατοντάδες bytes ανά record + δευτερόλεπτα στο startup)
+κρατάμε ένα binary αρχείο με arrays:
+
+    magic "TDS1" | u32 header_len | JSON header | sections (8-byte aligned)
+
+Sections (n = πλήθος student_ids, ταξινομημένα κατά UTF-8 bytes):
+- id_offsets   u32[n+1] + id_heap      => binary search για student_id
+- name_offsets u32[n+1] + name_heap
+- status       u8[n]    (dictionary encoded, το dictionary είναι στο header)
+- flags        u8[n]    (bit 0: student, bit 1: finance, bit 2: absences)
+- balance      f64[n]
+- absences     i64[n]
+Τα limits (λίγα key/value) είναι στο JSON header.
+
+Το αρχείο γίνεται mmap (read-only) => τα pages μοιράζονται μέσω page cache
+σε όλα τα worker processes και τα lookups διαβάζουν μόνο το row που ζητήθηκε.
+
+Import από CSV exports:
+    python -m app.services.columnar_store import --tenant <tenant_id> --dir <csv_dir>
+
+με αρχεία (όσα υπάρχουν): students.csv (student_id,name,status),
+finance.csv (student_id,balance_eur), absences.csv (student_id,total), limits.csv (key,value).
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent  # .../backend
+TENANT_DATA_DIR = Path(os.getenv("TENANT_DATA_DIR", str(BASE_DIR / "data" / "tenants")))
+
+MAGIC = b"TDS1"
+
+_HAS_STUDENT = 1
+_HAS_FINANCE = 2
+_HAS_ABSENCES = 4
+
+_ENTITY_FLAG = {"students": _HAS_STUDENT, "finance": _HAS_FINANCE, "absences": _HAS_ABSENCES}
+
+
+def store_path(tenant_id: str) -> Path:
+    return TENANT_DATA_DIR / f"{tenant_id}.tds"
+
+
+# -------------------------
+# Import (CSV -> columnar file)
+# -------------------------
+def _read_csv(path: Path) -> Iterator[Dict[str, str]]:
+    if not path.exists():
+        return
+    # utf-8-sig: τα Excel exports έχουν συχνά BOM
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+
+def _pad(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % 8))
+
+
+def import_csv(tenant_id: str, csv_dir: Path, out_path: Optional[Path] = None) -> Path:
+    """
+    Διαβάζει (streaming) τα CSV exports ενός tenant και γράφει το columnar αρχείο
+    atomically (temp file + rename), ώστε οι readers να μη βλέπουν ποτέ μισό αρχείο.
+    """
+    csv_dir = Path(csv_dir)
+    out_path = Path(out_path) if out_path else store_path(tenant_id)
+
+    # Κρατάμε μόνο compact στήλες ανά student_id (όχι dict ανά record)
+    rows: Dict[bytes, int] = {}
+    ids: List[bytes] = []
+    names: List[str] = []
+    status_codes = array("B")
+    flags = array("B")
+    balance = array("d")
+    absences = array("q")
+    statuses: List[str] = []
+    status_index: Dict[str, int] = {}
+
+    def row_of(student_id: str) -> int:
+        key = student_id.strip().encode("utf-8")
+        i = rows.get(key)
+        if i is None:
+            i = rows[key] = len(ids)
+            ids.append(key)
+            names.append("")
+            status_codes.append(0)
+            flags.append(0)
+            balance.append(0.0)
+            absences.append(0)
+        return i
+
+    def status_code(status: str) -> int:
+        code = status_index.get(status)
+        if code is None:
+            if len(statuses) >= 255:
+                raise ValueError("Too many distinct student statuses (max 255)")
+            code = status_index[status] = len(statuses)
+            statuses.append(status)
+        return code
+
+    for r in _read_csv(csv_dir / "students.csv"):
+        i = row_of(r["student_id"])
+        names[i] = r.get("name", "") or ""
+        status_codes[i] = status_code(r.get("status", "") or "active")
+        flags[i] |= _HAS_STUDENT
+
+    for r in _read_csv(csv_dir / "finance.csv"):
+        i = row_of(r["student_id"])
+        balance[i] = float(r.get("balance_eur") or 0)
+        flags[i] |= _HAS_FINANCE
+
+    for r in _read_csv(csv_dir / "absences.csv"):
+        i = row_of(r["student_id"])
+        absences[i] = int(r.get("total") or 0)
+        flags[i] |= _HAS_ABSENCES
+
+    limits: Dict[str, Any] = {}
+    for r in _read_csv(csv_dir / "limits.csv"):
+        raw = (r.get("value") or "").strip()
+        try:
+            limits[r["key"]] = int(raw)
+        except ValueError:
+            limits[r["key"]] = raw
+
+    del rows
+    order = sorted(range(len(ids)), key=ids.__getitem__)
+    n = len(order)
+
+    # Sections
+    sections: Dict[str, bytes] = {}
+
+    def heap(values: List[bytes]) -> Tuple[bytes, bytes]:
+        offsets = array("I", [0])
+        data = bytearray()
+        for v in values:
+            data.extend(v)
+            offsets.append(len(data))
+        return offsets.tobytes(), bytes(data)
+
+    sections["id_offsets"], sections["id_heap"] = heap([ids[i] for i in order])
+    sections["name_offsets"], sections["name_heap"] = heap([names[i].encode("utf-8") for i in order])
+    sections["status"] = array("B", (status_codes[i] for i in order)).tobytes()
+    sections["flags"] = array("B", (flags[i] for i in order)).tobytes()
+    sections["balance"] = array("d", (balance[i] for i in order)).tobytes()
+    sections["absences"] = array("q", (absences[i] for i in order)).tobytes()
+
+    # Offsets είναι relative στην αρχή του body (μετά το header)
+    body = bytearray()
+    layout: Dict[str, List[int]] = {}
+    for name, data in sections.items():
+        _pad(body)
+        layout[name] = [len(body), len(data)]
+        body.extend(data)
+
+    header = json.dumps(
+        {"tenant_id": tenant_id, "n": n, "statuses": statuses, "limits": limits, "sections": layout},
+        ensure_ascii=False,
+    ).encode("utf-8")
+    head = bytearray(MAGIC + struct.pack("<I", len(header)) + header)
+    _pad(head)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(head)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, out_path)
+    return out_path
+
+
+# -------------------------
+# Reader (mmap)
+# -------------------------
+class ColumnarTenantStore:
+    """Read-only view ενός columnar αρχείου. Δεν φορτώνει records στη μνήμη."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:4] != MAGIC:
+            raise ValueError(f"Not a tenant dataset file: {self.path}")
+        (header_len,) = struct.unpack_from("<I", self._mm, 4)
+        header = json.loads(self._mm[8:8 + header_len].decode("utf-8"))
+        body = 8 + header_len + (-(8 + header_len) % 8)
+
+        self.n: int = header["n"]
+        self.statuses: List[str] = header["statuses"]
+        self.limits: Dict[str, Any] = header["limits"]
+
+        view = memoryview(self._mm)
+
+        def section(name: str, fmt: str) -> memoryview:
+            off, length = header["sections"][name]
+            mv = view[body + off: body + off + length]
+            return mv.cast(fmt) if fmt != "B" else mv
+
+        self._id_off = section("id_offsets", "I")
+        self._id_heap = section("id_heap", "B")
+        self._name_off = section("name_offsets", "I")
+        self._name_heap = section("name_heap", "B")
+        self._status = section("status", "B")
+        self._flags = section("flags", "B")
+        self._balance = section("balance", "d")
+        self._absences = section("absences", "q")
+
+    def _id_at(self, i: int) -> bytes:
+        return bytes(self._id_heap[self._id_off[i]:self._id_off[i + 1]])
+
+    def find(self, student_id: str) -> int:
+        """Binary search στα ταξινομημένα ids. -1 αν δεν υπάρχει."""
+        # το fields.student_id είναι free-form JSON (μπορεί να έρθει αριθμός)
+        key = str(student_id).encode("utf-8")
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._id_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n and self._id_at(lo) == key:
+            return lo
+        return -1
+
+    def record(self, entity: str, student_id: str) -> Optional[Dict[str, Any]]:
+        """Ένα record (στο schema του MOCK_DB) ή None."""
+        flag = _ENTITY_FLAG.get(entity)
+        if flag is None:
+            return None
+        i = self.find(student_id)
+        if i < 0 or not (self._flags[i] & flag):
+            return None
+
+        if entity == "students":
+            name = bytes(self._name_heap[self._name_off[i]:self._name_off[i + 1]]).decode("utf-8")
+            return {"name": name, "status": self.statuses[self._status[i]]}
+        if entity == "finance":
+            return {"balance_eur": self._balance[i]}
+        return {"total": self._absences[i]}
+
+    def keys(self, entity: str) -> Iterator[str]:
+        flag = _ENTITY_FLAG[entity]
+        for i in range(self.n):
+            if self._flags[i] & flag:
+                yield self._id_at(i).decode("utf-8")
+
+
+class _EntityView(Mapping):
+    """dict-like view ενός entity, με lookups κατευθείαν από το mmap."""
+
+    def __init__(self, store: ColumnarTenantStore, entity: str):
+        self._store = store
+        self._entity = entity
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        rec = self._store.record(self._entity, key)
+        if rec is None:
+            raise KeyError(key)
+        return rec
+
+    def __iter__(self) -> Iterator[str]:
+        return self._store.keys(self._entity)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+# Ένα ανοιχτό store ανά tenant ανά process (reopen αν το αρχείο αντικαταστάθηκε)
+_STORES: Dict[str, ColumnarTenantStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_store(tenant_id: str) -> Optional[ColumnarTenantStore]:
+    path = store_path(tenant_id)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    store = _STORES.get(tenant_id)
+    if store is not None and store.stamp == stamp:
+        return store
+
+    with _STORES_LOCK:
+        store = _STORES.get(tenant_id)
+        if store is None or store.stamp != stamp:
+            # Το παλιό mmap δεν κλείνει ρητά: μπορεί να το διαβάζει ακόμα άλλο request
+            store = _STORES[tenant_id] = ColumnarTenantStore(path)
+        return store
+
+
+def columnar_get_tenant_db(tenant_id: str) -> Dict[str, Any]:
+    store = open_store(tenant_id)
+    if store is None:
+        return {"students": {}, "finance": {}, "absences": {}, "limits": {}}
+    return {
+        "students": _EntityView(store, "students"),
+        "finance": _EntityView(store, "finance"),
+        "absences": _EntityView(store, "absences"),
+        "limits": dict(store.limits),
+    }
+
+
+def columnar_fetch_records(tenant_id: str, entity: str, keys: Iterable[str]) -> Dict[str, Any]:
+    store = open_store(tenant_id)
+    if store is None:
+        return {}
+    if entity == "limits":
+        return {k: store.limits[k] for k in keys if k in store.limits}
+
+    out: Dict[str, Any] = {}
+    for k in keys:
+        rec = store.record(entity, k)
+        if rec is not None:
+            out[k] = rec
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tenant columnar dataset tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_imp = sub.add_parser("import", help="CSV exports -> columnar αρχείο")
+    p_imp.add_argument("--tenant", required=True)
+    p_imp.add_argument("--dir", required=True, type=Path, help="φάκελος με students.csv / finance.csv / ...")
+    p_imp.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "import":
+        path = import_csv(args.tenant, args.dir, args.out)
+        store = ColumnarTenantStore(path)
+        print(f"imported {store.n} students -> {path} ({path.stat().st_size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+dataloader.py
+
+Request-scoped data loader για τα actions.
+
+Κάθε action ζητά records με (tenant_id, entity, key), π.χ.
+("t1", "students", "STU-001"). Ο loader:
+- κάνει memoize: κάθε record φέρνεται το πολύ μία φορά ανά request (ή batch)
+- κάνει batch: load_many / prime φέρνουν πολλά keys με ΕΝΑ backend call
+- είναι thread-safe: αν δύο παράλληλα actions ζητήσουν το ίδιο key,
+  το δεύτερο περιμένει το πρώτο αντί να ξανακάνει query
+  (αν το fetch αποτύχει, όσοι περίμεναν παίρνουν το ίδιο exception, όχι "not found")
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from app.services.tenant_data import fetch_records
+
+# (tenant_id, entity, keys) -> {key: record}
+FetchFn = Callable[[str, str, Iterable[str]], Dict[str, Any]]
+
+_NOT_FOUND = object()
+
+
+class _Pending:
+    """Ένα fetch σε εξέλιξη: οι waiters περιμένουν το event και ελέγχουν το error."""
+
+    __slots__ = ("event", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.error: BaseException | None = None
+
+
+class TenantDataLoader:
+    def __init__(self, fetch: FetchFn = fetch_records):
+        self._fetch = fetch
+        self._cache: Dict[Tuple[str, str, str], Any] = {}
+        self._inflight: Dict[Tuple[str, str, str], _Pending] = {}
+        self._lock = threading.Lock()
+
+        # πόσα backend calls έγιναν (χρήσιμο για monitoring/benchmarks)
+        self.fetches = 0
+
+    def load_many(self, tenant_id: str, entity: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """{key: record} για όσα keys υπάρχουν (τα missing απλώς λείπουν)."""
+        wanted = list(dict.fromkeys(keys))
+        to_fetch: List[str] = []
+        to_wait: List[_Pending] = []
+
+        with self._lock:
+            for k in wanted:
+                ck = (tenant_id, entity, k)
+                if ck in self._cache:
+                    continue
+                pending = self._inflight.get(ck)
+                if pending is not None:
+                    to_wait.append(pending)
+                else:
+                    self._inflight[ck] = _Pending()
+                    to_fetch.append(k)
+
+        if to_fetch:
+            error: BaseException | None = None
+            try:
+                found = self._fetch(tenant_id, entity, to_fetch)
+                with self._lock:
+                    self.fetches += 1
+                    for k in to_fetch:
+                        self._cache[(tenant_id, entity, k)] = found.get(k, _NOT_FOUND)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                # Αποτυχία => δεν γίνεται cache (επόμενο load ξαναδοκιμάζει)
+                with self._lock:
+                    for k in to_fetch:
+                        pending = self._inflight.pop((tenant_id, entity, k))
+                        pending.error = error
+                        pending.event.set()
+
+        for pending in to_wait:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+
+        out: Dict[str, Any] = {}
+        with self._lock:
+            for k in wanted:
+                v = self._cache.get((tenant_id, entity, k), _NOT_FOUND)
+                if v is not _NOT_FOUND:
+                    out[k] = v
+        return out
+
+    def load(self, tenant_id: str, entity: str, key: str, default: Any = None) -> Any:
+        return self.load_many(tenant_id, entity, [key]).get(key, default)
+
+    def prime(self, tenant_id: str, entity: str, keys: Iterable[str]) -> None:
+        """Φέρνει από πριν (με ένα call) keys που ξέρουμε ότι θα χρειαστούν."""
+        self.load_many(tenant_id, entity, keys)
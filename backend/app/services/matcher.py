@@ -0,0 +1,93 @@
+"""
+matcher.py
+
+Multi-pattern substring matcher (Aho-Corasick) για τον rule engine.
+
+Αντί για ένα `term in q` ανά term ανά rule, χτίζουμε ΜΙΑ φορά ανά ruleset
+ένα automaton με όλα τα (normalized) terms. Με ένα πέρασμα πάνω στην
+ερώτηση βρίσκουμε ποια terms υπάρχουν μέσα της (και τα επικαλυπτόμενα).
+
+Κόστος ανά ερώτηση: O(len(question) + hits), ανεξάρτητο από το πλήθος terms.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List
+
+
+class TermMatcher:
+    """
+    Immutable Aho-Corasick automaton πάνω σε χαρακτήρες.
+
+    - find(text) -> frozenset με όσα patterns εμφανίζονται ως substring στο text
+    - Το κενό pattern "" θεωρείται ότι υπάρχει σε κάθε text (όπως το `"" in q`)
+    """
+
+    __slots__ = ("_goto", "_fail", "_out", "_has_empty", "_patterns")
+
+    def __init__(self, patterns: Iterable[str]):
+        uniq = sorted({p for p in patterns})
+        self._patterns: FrozenSet[str] = frozenset(uniq)
+        self._has_empty = "" in self._patterns
+
+        # state 0 = root
+        goto: List[Dict[str, int]] = [{}]
+        out: List[FrozenSet[str]] = [frozenset()]
+        own: List[List[str]] = [[]]
+
+        # 1) trie
+        for p in uniq:
+            if not p:
+                continue
+            s = 0
+            for ch in p:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[s][ch] = nxt
+                    goto.append({})
+                    own.append([])
+                s = nxt
+            own[s].append(p)
+
+        # 2) failure links (BFS) + outputs που "κληρονομούνται" από το fail state
+        fail = [0] * len(goto)
+        out = [frozenset(o) for o in own]
+        queue = deque(goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, nxt in goto[s].items():
+                queue.append(nxt)
+                f = fail[s]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                cand = goto[f].get(ch, 0)
+                fail[nxt] = cand if cand != nxt else 0
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] | out[fail[nxt]]
+
+        self._goto = tuple(goto)
+        self._fail = tuple(fail)
+        self._out = tuple(out)
+
+    @property
+    def patterns(self) -> FrozenSet[str]:
+        return self._patterns
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Ένα πέρασμα πάνω στο text: επιστρέφει όλα τα patterns που βρέθηκαν."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits: set[str] = {""} if self._has_empty else set()
+
+        s = 0
+        for ch in text or "":
+            nxt = goto[s].get(ch)
+            while nxt is None and s:
+                s = fail[s]
+                nxt = goto[s].get(ch)
+            s = nxt or 0
+            if out[s]:
+                hits.update(out[s])
+
+        return frozenset(hits)
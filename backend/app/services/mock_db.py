@@ -8,7 +8,7 @@ Fake database για demo/MVP.
 Αργότερα αυτό αντικαθίσταται με κανονικά DB queries.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 
 # tenant_id -> dataset
 MOCK_DB: Dict[str, Dict[str, Any]] = {
@@ -37,3 +37,12 @@ def get_tenant_db(tenant_id: str) -> Dict[str, Any]:
     Αν δεν έχουμε ειδικό dataset, χρησιμοποιούμε DEFAULT.
     """
     return MOCK_DB.get(tenant_id, MOCK_DB["DEFAULT"])
+
+def fetch_records(tenant_id: str, entity: str, keys: Iterable[str]) -> Dict[str, Any]:
+    """
+    Batched lookup: επιστρέφει {key: record} για όσα keys υπάρχουν
+    στον πίνακα `entity` (students / finance / absences / limits) του tenant.
+    Ίδιο contract που θα έχει ένα πραγματικό `WHERE key IN (...)`.
+    """
+    table = get_tenant_db(tenant_id).get(entity) or {}
+    return {k: table[k] for k in keys if k in table}
@@ -0,0 +1,238 @@
+"""
+principals.py
+
+Cache "verified principals": ποιος είναι ο χρήστης πίσω από ένα token
+(user, role, tenant, org_type), ώστε τα authenticated requests να μην
+κάνουν User/Tenant queries κάθε φορά.
+
+- key: το `sub` (user id) του JWT. Το token επαληθεύεται πάντα (signature/exp),
+  το cache γλιτώνει μόνο τα DB lookups.
+- bounded + TTL (app/services/cache.py)
+- invalidation: ρητά (invalidate_user / invalidate_tenant) και αυτόματα
+  όταν αλλάζει/σβήνεται User ή Tenant μέσω ORM (SQLAlchemy events), ΜΕΤΑ το commit:
+  σε invalidation στο flush ένα ταυτόχρονο request θα ξαναδιάβαζε την παλιά
+  (ακόμα committed) γραμμή και θα την έβαζε πίσω στο cache για όλο το TTL.
+- cross-process: κάθε invalidation γράφεται (append) στο PRINCIPAL_INVALIDATION_LOG.
+  Τα υπόλοιπα workers κάνουν ένα stat του αρχείου σε κάθε lookup και εφαρμόζουν
+  ό,τι προστέθηκε από την τελευταία φορά (αν το αρχείο αντικατασταθεί/σβηστεί =>
+  άδειασμα όλου του cache). Το αρχείο πρέπει να είναι κοινό για όλα τα workers
+  (ίδιος host / shared volume). Αλλαγές εκτός ORM (raw SQL) χωρίς ρητό invalidate_*
+  φαίνονται μόνο μετά το TTL.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import Select, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.models import Tenant, User
+from app.services.cache import TTLCache
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+# Κοινό (για όλα τα workers) append-only log με τα invalidations: "u <user_id>" / "t <tenant_id>"
+BASE_DIR = Path(__file__).resolve().parent.parent.parent  # .../backend
+PRINCIPAL_INVALIDATION_LOG = Path(
+    os.getenv("PRINCIPAL_INVALIDATION_LOG", str(BASE_DIR / "data" / "principals.invalidate"))
+)
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Ό,τι χρειάζονται οι routes για τον τρέχοντα χρήστη (χωρίς ORM object/session)."""
+    id: str
+    email: str
+    role: str
+    tenant_id: str
+    org_type: Optional[str]  # None => ο tenant δεν υπάρχει πια
+
+
+_PRINCIPALS: TTLCache[Principal] = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def _principal_query(user_id: str) -> Select:
+    # ΕΝΑ query: User LEFT JOIN Tenant (org_type None => ο tenant δεν υπάρχει)
+    return (
+        select(User.id, User.email, User.role, User.tenant_id, Tenant.org_type)
+        .outerjoin(Tenant, Tenant.id == User.tenant_id)
+        .where(User.id == user_id)
+    )
+
+
+def _remember(user_id: str, row: Any) -> Optional[Principal]:
+    if row is None:
+        return None
+    principal = Principal(id=row[0], email=row[1], role=row[2], tenant_id=row[3], org_type=row[4])
+    _PRINCIPALS.set(user_id, principal)
+    return principal
+
+
+# -------------------------
+# Cross-process invalidation (append-only log)
+# -------------------------
+# (inode, offset) ως το σημείο που έχουμε εφαρμόσει. None => δεν έχουμε δει ακόμα το αρχείο.
+_LOG_SEEN: Optional[Tuple[int, int]] = None
+_LOG_LOCK = threading.Lock()
+
+
+def _apply_line(line: str) -> None:
+    kind, _, key = line.partition(" ")
+    if kind == "u":
+        _PRINCIPALS.pop(key)
+    elif kind == "t":
+        _PRINCIPALS.discard_if(lambda _k, p: p.tenant_id == key)
+
+
+def _sync_invalidations() -> None:
+    """Εφαρμόζει τα invalidations που έγραψαν άλλα processes (ένα stat αν δεν άλλαξε τίποτα)."""
+    global _LOG_SEEN
+    try:
+        st = os.stat(PRINCIPAL_INVALIDATION_LOG)
+    except FileNotFoundError:
+        if _LOG_SEEN is not None:
+            # το log σβήστηκε: δεν ξέρουμε τι χάθηκε
+            with _LOG_LOCK:
+                _LOG_SEEN = None
+                _PRINCIPALS.clear()
+        return
+
+    seen = _LOG_SEEN
+    if seen is not None and seen == (st.st_ino, st.st_size):
+        return
+
+    with _LOG_LOCK:
+        seen = _LOG_SEEN
+        if seen is None or seen[0] != st.st_ino or st.st_size < seen[1]:
+            # Πρώτη ματιά (στο startup το cache είναι άδειο) ή αρχείο που
+            # αντικαταστάθηκε / truncated: δεν ξέρουμε τι άλλαξε => όλα από την αρχή
+            _PRINCIPALS.clear()
+            _LOG_SEEN = (st.st_ino, st.st_size)
+            return
+        ino, offset = seen
+
+        try:
+            with open(PRINCIPAL_INVALIDATION_LOG, "rb") as f:
+                f.seek(offset)
+                chunk = f.read()
+        except OSError:
+            return
+        # μόνο ολόκληρες γραμμές (ένα append μπορεί να είναι στη μέση)
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8", "replace").splitlines():
+            _apply_line(line)
+        _LOG_SEEN = (ino, offset + len(complete))
+
+
+def _publish(users: Iterable[str] = (), tenants: Iterable[str] = ()) -> None:
+    lines = [f"u {user_id}\n" for user_id in users] + [f"t {tenant_id}\n" for tenant_id in tenants]
+    if not lines:
+        return
+    try:
+        PRINCIPAL_INVALIDATION_LOG.parent.mkdir(parents=True, exist_ok=True)
+        # O_APPEND: τα writes μικρότερα από PIPE_BUF δεν μπλέκονται μεταξύ processes
+        fd = os.open(PRINCIPAL_INVALIDATION_LOG, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            for line in lines:
+                os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+    except OSError:
+        # Τα υπόλοιπα workers θα δουν την αλλαγή μετά το TTL
+        log.exception("Could not publish principal invalidation to %s", PRINCIPAL_INVALIDATION_LOG)
+
+
+def load_principal(db: Session, user_id: str) -> Optional[Principal]:
+    """Από cache, αλλιώς ΕΝΑ query (User LEFT JOIN Tenant)."""
+    _sync_invalidations()
+    principal = _PRINCIPALS.get(user_id)
+    if principal is not None:
+        return principal
+    return _remember(user_id, db.execute(_principal_query(user_id)).first())
+
+
+async def load_principal_async(db: AsyncSession, user_id: str) -> Optional[Principal]:
+    """Όπως load_principal, για AsyncSession (κοινό cache)."""
+    _sync_invalidations()
+    principal = _PRINCIPALS.get(user_id)
+    if principal is not None:
+        return principal
+    return _remember(user_id, (await db.execute(_principal_query(user_id))).first())
+
+
+def invalidate_user(user_id: str) -> None:
+    """Σε αυτό το process αμέσως, στα υπόλοιπα workers στο επόμενο lookup τους."""
+    _PRINCIPALS.pop(user_id)
+    _publish(users=[user_id])
+
+
+def invalidate_tenant(tenant_id: str) -> None:
+    """Σε αυτό το process αμέσως, στα υπόλοιπα workers στο επόμενο lookup τους."""
+    _PRINCIPALS.discard_if(lambda _k, p: p.tenant_id == tenant_id)
+    _publish(tenants=[tenant_id])
+
+
+def clear_principal_cache() -> None:
+    _PRINCIPALS.clear()
+
+
+def principal_cache_stats() -> Dict[str, Any]:
+    return _PRINCIPALS.stats()
+
+
+# -------------------------
+# Αυτόματο invalidation σε αλλαγές μέσω ORM
+# -------------------------
+# Τα ids που άλλαξαν στο flush μαζεύονται στο session.info και γίνονται
+# invalidate στο after_commit (ισχύει και για AsyncSession: από κάτω είναι Session)
+_PENDING_KEY = "principals.invalidate"
+
+
+def _pending(target: Any) -> Optional[Dict[str, Set[str]]]:
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_PENDING_KEY, {"users": set(), "tenants": set()})
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(_mapper, _connection, target: User) -> None:
+    pending = _pending(target)
+    if pending is None:
+        invalidate_user(target.id)
+    else:
+        pending["users"].add(target.id)
+
+
+@event.listens_for(Tenant, "after_update")
+@event.listens_for(Tenant, "after_delete")
+def _tenant_changed(_mapper, _connection, target: Tenant) -> None:
+    pending = _pending(target)
+    if pending is None:
+        invalidate_tenant(target.id)
+    else:
+        pending["tenants"].add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    # Μετά από rollback τα ids μένουν: το πολύ ένα περιττό invalidation στο επόμενο commit
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for user_id in pending["users"]:
+        _PRINCIPALS.pop(user_id)
+    for tenant_id in pending["tenants"]:
+        _PRINCIPALS.discard_if(lambda _k, p, tenant_id=tenant_id: p.tenant_id == tenant_id)
+    _publish(pending["users"], pending["tenants"])
@@ -0,0 +1,222 @@
+"""
+provisioning.py
+
+Bulk provisioning tenants + users (π.χ. onboarding μιας περιφέρειας με 400 colleges).
+
+Αντί για signup ανά γραμμή (2 commits, 2 refreshes, σειριακό Argon2):
+1) validation όλων των γραμμών (errors ανά γραμμή, οι υπόλοιπες συνεχίζουν)
+2) ένα query (chunked IN) για emails που υπάρχουν ήδη
+3) παράλληλο hashing στο password process pool (auth.hash_passwords)
+4) ΕΝΑ transaction: executemany για tenants και μετά για users
+
+Μορφή εισόδου (CSV με header ή JSON list of objects), μία γραμμή ανά user:
+    tenant,org_name,org_type,email,password,role
+- `tenant`: κλειδί μέσα στο αρχείο. Γραμμές με το ίδιο `tenant` => ίδιος tenant
+  (org_name/org_type από την πρώτη έγκυρη γραμμή του)
+- `role`: προαιρετικό (default "admin")
+
+CLI:
+    python -m app.services.provisioning <file.csv|file.json>
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import BaseModel, ValidationError, field_validator
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from app import db as app_db
+from app.models import Tenant, User
+from app.services.auth import hash_passwords
+
+# Πόσα emails ανά `IN (...)` query
+_IN_CHUNK = 500
+
+# Ελαφρύς έλεγχος email: το EmailStr (email_validator) κοστίζει ~0.5ms/γραμμή,
+# δηλαδή δευτερόλεπτα σε αρχεία 10k γραμμών
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+class ProvisionRow(BaseModel):
+    tenant: str
+    org_name: str
+    org_type: str
+    email: str
+    password: str
+    role: str = "admin"
+
+    @field_validator("role", mode="before")
+    @classmethod
+    def _default_role(cls, v: Any) -> Any:
+        return v or "admin"  # κενή στήλη στο CSV => default
+
+    @field_validator("tenant", "org_name", "org_type", "role")
+    @classmethod
+    def _strip(cls, v: str) -> str:
+        if not v.strip():
+            raise ValueError("must not be empty")
+        return v.strip()
+
+    @field_validator("email")
+    @classmethod
+    def _email(cls, v: str) -> str:
+        v = v.strip().lower()
+        if not _EMAIL_RE.match(v):
+            raise ValueError("invalid email address")
+        return v
+
+    @field_validator("password")
+    @classmethod
+    def _password(cls, v: str) -> str:
+        if not v:
+            raise ValueError("must not be empty")
+        return v
+
+
+# -------------------------
+# Parsing
+# -------------------------
+def parse_rows(raw: bytes, filename: str = "") -> List[Dict[str, Any]]:
+    """CSV (με header) ή JSON list. Το format βγαίνει από την κατάληξη ή το πρώτο byte."""
+    text = raw.decode("utf-8-sig")
+    if filename.lower().endswith(".json") or text.lstrip().startswith("["):
+        data = json.loads(text)
+        if not isinstance(data, list):
+            raise ValueError("JSON input must be a list of objects")
+        return data
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _row_error(errors: List[Dict[str, Any]], index: int, message: str) -> None:
+    errors.append({"row": index, "error": message})
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+# -------------------------
+# Provisioning
+# -------------------------
+def _existing_emails(engine: Engine, emails: List[str]) -> Set[str]:
+    found: Set[str] = set()
+    with engine.connect() as conn:
+        for i in range(0, len(emails), _IN_CHUNK):
+            found.update(conn.execute(select(User.email).where(User.email.in_(emails[i:i + _IN_CHUNK]))).scalars())
+    return found
+
+
+def provision(raw_rows: List[Dict[str, Any]], engine: Optional[Engine] = None) -> Dict[str, Any]:
+    """
+    Δημιουργεί tenants + users από raw rows.
+    Επιστρέφει report: πόσα δημιουργήθηκαν, tenant key -> id και errors ανά γραμμή (0-based).
+    """
+    engine = engine or app_db.engine
+    errors: List[Dict[str, Any]] = []
+
+    # 1) validation + συνέπεια tenant / μοναδικότητα email μέσα στο αρχείο
+    rows: Dict[int, ProvisionRow] = {}
+    tenant_specs: Dict[str, ProvisionRow] = {}
+    seen_emails: Dict[str, int] = {}
+    for index, raw in enumerate(raw_rows):
+        try:
+            row = ProvisionRow.model_validate(raw)
+        except ValidationError as e:
+            _row_error(errors, index, _validation_message(e))
+            continue
+
+        spec = tenant_specs.setdefault(row.tenant, row)
+        if (spec.org_name, spec.org_type) != (row.org_name, row.org_type):
+            _row_error(errors, index, f"tenant {row.tenant!r} has conflicting org_name/org_type")
+            continue
+        if row.email in seen_emails:
+            _row_error(errors, index, f"duplicate email in input (row {seen_emails[row.email]})")
+            continue
+        seen_emails[row.email] = index
+        rows[index] = row
+
+    # 2) emails που υπάρχουν ήδη στη DB
+    taken = _existing_emails(engine, list(seen_emails))
+    for index in [i for i, r in rows.items() if r.email in taken]:
+        _row_error(errors, index, "Email already registered")
+        del rows[index]
+
+    # 3) hashing παράλληλα (μόνο για τις γραμμές που θα γραφτούν)
+    order = sorted(rows)
+    hashes = hash_passwords([rows[i].password for i in order])
+
+    # 4) ένα transaction, executemany
+    while True:
+        hashed = dict(zip(order, hashes))
+        tenant_ids = {key: str(uuid.uuid4()) for key in sorted({rows[i].tenant for i in order})}
+        tenant_values = [
+            {"id": tid, "name": tenant_specs[key].org_name, "org_type": tenant_specs[key].org_type}
+            for key, tid in tenant_ids.items()
+        ]
+        user_values = [
+            {
+                "id": str(uuid.uuid4()),
+                "email": rows[i].email,
+                "password_hash": hashed[i],
+                "tenant_id": tenant_ids[rows[i].tenant],
+                "role": rows[i].role,
+            }
+            for i in order
+        ]
+
+        try:
+            with engine.begin() as conn:
+                if tenant_values:
+                    conn.execute(insert(Tenant.__table__), tenant_values)
+                if user_values:
+                    conn.execute(insert(User.__table__), user_values)
+            break
+        except IntegrityError:
+            # κάποιο email γράφτηκε στο μεταξύ (π.χ. ταυτόχρονο signup): rollback,
+            # τις βγάζουμε ως errors και ξαναδοκιμάζουμε με τις υπόλοιπες
+            raced = _existing_emails(engine, [v["email"] for v in user_values])
+            if not raced:
+                raise
+            for i in order:
+                if rows[i].email in raced:
+                    _row_error(errors, i, "Email already registered")
+            keep = [k for k, i in enumerate(order) if rows[i].email not in raced]
+            order = [order[k] for k in keep]
+            hashes = [hashes[k] for k in keep]
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "rows": len(raw_rows),
+        "tenants_created": len(tenant_values),
+        "users_created": len(user_values),
+        "tenants": tenant_ids,
+        "errors": errors,
+    }
+
+
+# -------------------------
+# CLI
+# -------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk provisioning tenants + users")
+    parser.add_argument("file", type=Path, help="CSV (με header) ή JSON")
+    args = parser.parse_args(argv)
+
+    report = provision(parse_rows(args.file.read_bytes(), args.file.name))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
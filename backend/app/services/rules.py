@@ -3,58 +3,310 @@ rules.py
 
 Rule engine για MVP (αναβαθμισμένο):
 - Φορτώνει ruleset JSON ανά org_type από app/rulesets/{org_type}_v1.json
+  - versioned (mtime + sha256), hot reload στο background χωρίς restart
 - Κάνει robust matching:
   1) normalization (πεζά, χωρίς τόνους, χωρίς στίξη)
   2) strict match (substring) σε match_any / match_all
+     - τα terms γίνονται normalize μία φορά στο load (compiled ruleset)
+     - ένα Aho-Corasick πέρασμα στην ερώτηση βρίσκει όλα τα hits μαζί
+     - inverted index term -> rules: εξετάζουμε μόνο rules με τουλάχιστον ένα hit
   3) fuzzy fallback (τυπογραφικά) για match_any
+     - ένα batched rapidfuzz call για όλα τα terms όλων των υποψήφιων rules
+     - inverted index bigram -> terms: από τα rules χωρίς match_all εξετάζονται μόνο
+       terms με αρκετά κοινά bigrams με την ερώτηση (count filter)
+     - n-gram prefilter πετάει terms που δεν μπορούν να φτάσουν το threshold
+- Cache της επιλογής rule ανά (org_type, ruleset version, normalized question)
 - Επιστρέφει structured απόφαση: decision, answer, actions, rule_id, confidence
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
-import re
-import unicodedata
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+
+from app.services.cache import TTLCache
+from app.services.matcher import TermMatcher
+from app.services.text import normalize_el, normalize_question
 
 RULESETS_DIR = Path(__file__).resolve().parent.parent / "rulesets"
 
-# simple cache: org_type -> ruleset dict
-_RULESET_CACHE: Dict[str, Dict[str, Any]] = {}
+# partial_ratio threshold για το fuzzy fallback του match_any
+FUZZY_THRESHOLD = 78
+
+logger = logging.getLogger(__name__)
+
+# Κάθε πόσα δευτερόλεπτα (το πολύ) κάνουμε stat() το αρχείο για αλλαγές
+RULESET_CHECK_INTERVAL_SECONDS = float(os.getenv("RULESET_CHECK_INTERVAL_SECONDS", "2"))
+
+# cache: org_type -> slot με το τρέχον compiled ruleset
+_RULESET_CACHE: Dict[str, "_RulesetSlot"] = {}
 
+# Background recompile: ένα worker, το πολύ ένα pending reload ανά org_type
+_RELOAD_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ruleset-reload")
+_RELOAD_LOCK = threading.Lock()
+_RELOADING: set[str] = set()
 
-def _load_ruleset(org_type: str) -> Dict[str, Any]:
+# Cache της επιλογής rule: (org_type, version_id, normalized question) -> (rule, debug)
+# Μόνο το rule selection γίνεται cache, ΟΧΙ τα actions (εξαρτώνται από τα fields).
+DECISION_CACHE_SIZE = int(os.getenv("DECISION_CACHE_SIZE", "10000"))
+DECISION_CACHE_TTL_SECONDS = float(os.getenv("DECISION_CACHE_TTL_SECONDS", "600"))
+_DECISION_CACHE: TTLCache[Tuple[Optional["CompiledRule"], Dict[str, Any]]] = TTLCache(
+    maxsize=DECISION_CACHE_SIZE,
+    ttl=DECISION_CACHE_TTL_SECONDS,
+)
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """
+    Ένα rule με τα terms ήδη normalized (μία φορά στο load, όχι ανά request).
+    Κρατάμε και τα διπλότυπα (π.χ. "βεβαίωση"/"βεβαιωση") γιατί μετράνε στο score.
+    """
+    rule: Dict[str, Any]
+    match_any: Tuple[str, ...]
+    match_all: Tuple[str, ...]
+    confidence: float
+
+
+@dataclass(frozen=True)
+class CompiledRuleset:
+    """
+    Immutable "compiled" ruleset:
+    - raw: το JSON όπως φορτώθηκε
+    - rules: compiled rules (ίδια σειρά με το JSON)
+    - matcher: Aho-Corasick με ΟΛΑ τα terms όλων των rules
+    - term_grams: n-gram profile ανά match_any term (για το fuzzy prefilter)
+    - digest: sha256 του αρχείου => αλλάζει σε κάθε αλλαγή περιεχομένου
+    - term_rules: inverted index, term (match_any ή match_all) -> indexes rules
+    - any_term_rules: inverted index μόνο για match_any terms (για fuzzy hits)
+    - open_rules: rules χωρίς match_any/match_all (ταιριάζουν πάντα)
+    - open_any_terms: match_any terms των rules χωρίς match_all (fuzzy υποψήφια)
+    - open_gram_postings: bigram -> indexes στο open_any_terms (μία φορά ανά εμφάνιση)
+    - open_short_terms: indexes open_any_terms που είναι πάντα fuzzy υποψήφια (πολύ μικρά)
+    """
+    org_type: str
+    version: str
+    digest: str
+    raw: Dict[str, Any]
+    rules: Tuple[CompiledRule, ...]
+    matcher: TermMatcher
+    term_grams: Dict[str, Dict[str, int]]
+    term_rules: Dict[str, Tuple[int, ...]]
+    any_term_rules: Dict[str, Tuple[int, ...]]
+    open_rules: Tuple[int, ...]
+    open_any_terms: Tuple[str, ...]
+    open_gram_postings: Dict[str, Tuple[int, ...]]
+    open_short_terms: Tuple[int, ...]
+
+    @property
+    def version_id(self) -> str:
+        """π.χ. "1.0+3fa2c19b7d10": JSON version + content hash."""
+        return f"{self.version}+{self.digest[:12]}"
+
+
+def _compile_terms(terms: List[Any]) -> Tuple[str, ...]:
+    return tuple(_norm(x) for x in terms if str(x).strip())
+
+
+def _compile_ruleset(org_type: str, rs: Dict[str, Any], digest: str = "") -> CompiledRuleset:
+    compiled: List[CompiledRule] = []
+    for rule in rs.get("rules", []):
+        compiled.append(
+            CompiledRule(
+                rule=rule,
+                match_any=_compile_terms(rule.get("match_any", [])),
+                match_all=_compile_terms(rule.get("match_all", [])),
+                confidence=float(rule.get("confidence", 0.8)),
+            )
+        )
+
+    terms = [t for cr in compiled for t in (*cr.match_any, *cr.match_all)]
+    fuzzy_terms = {t for cr in compiled for t in cr.match_any if t}
+
+    # inverted index: term -> rules που το χρησιμοποιούν (σε σειρά JSON)
+    term_rules: Dict[str, List[int]] = {}
+    any_term_rules: Dict[str, List[int]] = {}
+    for i, cr in enumerate(compiled):
+        for t in dict.fromkeys((*cr.match_any, *cr.match_all)):
+            term_rules.setdefault(t, []).append(i)
+        for t in dict.fromkeys(cr.match_any):
+            any_term_rules.setdefault(t, []).append(i)
+
+    open_rules = tuple(i for i, cr in enumerate(compiled) if not cr.match_any and not cr.match_all)
+    open_any_terms = tuple(dict.fromkeys(t for cr in compiled if not cr.match_all for t in cr.match_any if t))
+
+    # bigram -> terms (με πολλαπλότητα) για το count filter του fuzzy stage
+    postings: Dict[str, List[int]] = {}
+    for i, t in enumerate(open_any_terms):
+        for g in _bigrams(t):
+            postings.setdefault(g, []).append(i)
+    short_terms = tuple(i for i, t in enumerate(open_any_terms) if _gram_need(len(t)) <= 0)
+    return CompiledRuleset(
+        org_type=org_type,
+        version=str(rs.get("version", "1.0")),
+        digest=digest,
+        raw=rs,
+        rules=tuple(compiled),
+        matcher=TermMatcher(terms),
+        term_grams={t: _grams(t) for t in fuzzy_terms},
+        term_rules={t: tuple(ix) for t, ix in term_rules.items()},
+        any_term_rules={t: tuple(ix) for t, ix in any_term_rules.items()},
+        open_rules=open_rules,
+        open_any_terms=open_any_terms,
+        open_gram_postings={g: tuple(ix) for g, ix in postings.items()},
+        open_short_terms=short_terms,
+    )
+
+
+class _RulesetSlot:
+    """
+    Η τρέχουσα έκδοση ενός ruleset + το (mtime_ns, size) του αρχείου της.
+    Το ruleset αντικαθίσταται ολόκληρο (atomic swap), οπότε όποιο request
+    έχει ήδη πάρει reference συνεχίζει με το δικό του snapshot.
+    """
+
+    __slots__ = ("ruleset", "stamp", "checked_at")
+
+    def __init__(self, ruleset: CompiledRuleset, stamp: Optional[Tuple[int, int]]):
+        self.ruleset = ruleset
+        self.stamp = stamp
+        self.checked_at = time.monotonic()
+
+
+def _ruleset_path(org_type: str) -> Path:
+    return RULESETS_DIR / f"{org_type}_v1.json"
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_ruleset(org_type: str) -> _RulesetSlot:
+    """Διαβάζει + κάνει compile το ruleset από τον δίσκο (χωρίς cache)."""
+    path = _ruleset_path(org_type)
+    # stamp ΠΡΙΝ το read: αν το αρχείο αλλάξει στο μεταξύ, ο επόμενος έλεγχος το ξαναπιάνει
+    stamp = _file_stamp(path)
+
+    if stamp is None:
+        rs = {"version": "1.0", "org_type": org_type, "rules": []}
+        digest = hashlib.sha256(b"").hexdigest()
+    else:
+        data = path.read_bytes()
+        rs = json.loads(data.decode("utf-8"))
+        digest = hashlib.sha256(data).hexdigest()
+
+    return _RulesetSlot(_compile_ruleset(org_type, rs, digest=digest), stamp)
+
+
+def _reload_ruleset(org_type: str) -> None:
+    try:
+        fresh = _read_ruleset(org_type)
+        current = _RULESET_CACHE.get(org_type)
+        if current is not None and current.ruleset.digest == fresh.ruleset.digest:
+            # ίδιο περιεχόμενο (π.χ. touch): κρατάμε το ίδιο object => ζεστό decision cache
+            fresh.ruleset = current.ruleset
+        _RULESET_CACHE[org_type] = fresh
+        if current is None or current.ruleset is not fresh.ruleset:
+            logger.info("Ruleset reloaded: org_type=%s version=%s", org_type, fresh.ruleset.version_id)
+    except Exception:
+        # π.χ. μισογραμμένο JSON: κρατάμε την παλιά έκδοση και ξαναδοκιμάζουμε
+        # μόλις το αρχείο αλλάξει ξανά (όχι σε κάθε έλεγχο)
+        logger.exception("Ruleset reload failed for org_type=%s (keeping previous version)", org_type)
+        current = _RULESET_CACHE.get(org_type)
+        if current is not None:
+            current.stamp = _file_stamp(_ruleset_path(org_type))
+    finally:
+        with _RELOAD_LOCK:
+            _RELOADING.discard(org_type)
+
+
+def _schedule_reload(org_type: str) -> None:
+    with _RELOAD_LOCK:
+        if org_type in _RELOADING:
+            return
+        _RELOADING.add(org_type)
+    _RELOAD_POOL.submit(_reload_ruleset, org_type)
+
+
+def _load_ruleset(org_type: str) -> CompiledRuleset:
     """
     Φορτώνει ruleset από: app/rulesets/{org_type}_v1.json
-    Με caching για να μην διαβάζουμε συνέχεια δίσκο.
+    και το κάνει compile (normalized terms + matcher).
+
+    - Πρώτη φορά: sync load (δεν υπάρχει τίποτα να σερβίρουμε)
+    - Μετά: σερβίρουμε από cache και κάθε RULESET_CHECK_INTERVAL_SECONDS
+      ελέγχουμε mtime/size. Αν άλλαξε, recompile στο background και atomic swap.
     """
     org_type = (org_type or "").strip().lower()
 
-    if org_type in _RULESET_CACHE:
-        return _RULESET_CACHE[org_type]
+    slot = _RULESET_CACHE.get(org_type)
+    if slot is None:
+        slot = _read_ruleset(org_type)
+        _RULESET_CACHE.setdefault(org_type, slot)
+        return slot.ruleset
 
-    path = RULESETS_DIR / f"{org_type}_v1.json"
-    if not path.exists():
-        rs = {"version": "1.0", "org_type": org_type, "rules": []}
-        _RULESET_CACHE[org_type] = rs
-        return rs
+    now = time.monotonic()
+    if now - slot.checked_at >= RULESET_CHECK_INTERVAL_SECONDS:
+        slot.checked_at = now
+        if _file_stamp(_ruleset_path(org_type)) != slot.stamp:
+            _schedule_reload(org_type)
 
-    rs = json.loads(path.read_text(encoding="utf-8"))
-    _RULESET_CACHE[org_type] = rs
-    return rs
+    return slot.ruleset
 
 
-def clear_ruleset_cache() -> None:
-    """Χρήσιμο σε dev αν αλλάζεις rulesets και δεν κάνεις restart."""
-    _RULESET_CACHE.clear()
+def refresh_ruleset(org_type: str, wait: bool = False) -> None:
+    """
+    Ζητά reload ενός συγκεκριμένου org_type (π.χ. από admin tooling).
+    wait=True => sync reload (χρήσιμο σε dev/scripts).
+    """
+    org_type = (org_type or "").strip().lower()
+    if wait:
+        with _RELOAD_LOCK:
+            _RELOADING.add(org_type)
+        _reload_ruleset(org_type)
+    else:
+        _schedule_reload(org_type)
+
+
+def clear_ruleset_cache(org_type: Optional[str] = None) -> None:
+    """
+    Χρήσιμο σε dev αν αλλάζεις rulesets και δεν κάνεις restart.
+    Με org_type καθαρίζει μόνο αυτό (τα υπόλοιπα μένουν ζεστά).
+    """
+    if org_type is None:
+        _RULESET_CACHE.clear()
+    else:
+        _RULESET_CACHE.pop((org_type or "").strip().lower(), None)
+
+
+def decision_cache_stats() -> Dict[str, Any]:
+    """hits / misses / evictions / expirations του decision cache."""
+    return _DECISION_CACHE.stats()
+
+
+def clear_decision_cache() -> None:
+    _DECISION_CACHE.clear()
 
 
 def _norm(text: str) -> str:
     """
-    Normalization για ελληνικά:
+    Normalization για ελληνικά (βλ. app/services/text.py):
     - lower
     - remove tonos/diacritics
     - remove punctuation
@@ -62,81 +314,227 @@ def _norm(text: str) -> str:
 
     Έτσι: "Αλλαγή Τμήματος!!!" == "αλλαγη τμηματος"
     """
-    if not text:
-        return ""
+    return normalize_el(text)
 
-    t = text.strip().lower()
 
-    # remove diacritics/tonos
-    t = unicodedata.normalize("NFD", t)
-    t = "".join(ch for ch in t if unicodedata.category(ch) != "Mn")
-    t = unicodedata.normalize("NFC", t)
+def _contains_all(hits: FrozenSet[str], terms: Tuple[str, ...]) -> bool:
+    return all(t in hits for t in terms)
 
-    # keep letters/numbers/spaces
-    t = re.sub(r"[^0-9a-zα-ω\s]", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
 
+def _contains_any(hits: FrozenSet[str], terms: Tuple[str, ...]) -> bool:
+    return any(t in hits for t in terms)
 
-def _contains_all(q: str, terms: List[str]) -> bool:
-    return all(t in q for t in terms)
 
+def _grams(text: str) -> Dict[str, int]:
+    """Character 1-gram profile (multiset χαρακτήρων) για το fuzzy prefilter."""
+    return dict(Counter(text))
 
-def _contains_any(q: str, terms: List[str]) -> bool:
-    return any(t in q for t in terms)
 
+def _may_reach(q_grams: Dict[str, int], q_len: int, term: str, t_grams: Dict[str, int], threshold: float) -> bool:
+    """
+    Άνω φράγμα του fuzz.partial_ratio(q, term) χωρίς να το υπολογίσουμε.
 
-def _fuzzy_any(q: str, terms: List[str], threshold: int = 78) -> bool:
+    Με m = min(len(q), len(term)) και C = κοινοί χαρακτήρες (multiset),
+    κάθε alignment έχει LCS <= C, άρα partial_ratio <= 200*C / (m + C).
+    Αν ούτε αυτό φτάνει το threshold, το term δεν μπορεί να περάσει.
+    """
+    common = 0
+    for ch, n in t_grams.items():
+        k = q_grams.get(ch)
+        if k:
+            common += n if n < k else k
+    m = min(q_len, len(term))
+    return 200 * common >= threshold * (m + common) and common > 0
+
+
+def _bigrams(text: str) -> List[str]:
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+# Κάτω φράγμα κοινών bigrams για partial_ratio >= threshold.
+# Needle s (το μικρότερο string, μήκος m) απέναντι σε παράθυρο w του άλλου (μήκος k <= m,
+# μικρότερο μόνο στις άκρες), LCS = L: κάθε χαρακτήρας του s εκτός LCS σπάει <= 2 bigrams
+# του s, κάθε "παρεμβαλλόμενος" χαρακτήρας του w <= 1, άρα >= 3L - m - k - 1 bigrams του s
+# υπάρχουν και στο άλλο string. Με ratio = 200L/(m+k) >= T: ελάχιστο πάνω σε όλα τα k.
+def _min_shared_bigrams(m: int, threshold: float) -> int:
+    need = None
+    for k in range(1, m + 1):
+        lcs = math.ceil(threshold * (m + k) / 200 - 1e-9)
+        if lcs > k:
+            continue
+        v = 3 * lcs - m - k - 1
+        need = v if need is None else min(need, v)
+    return max(0, need or 0)
+
+
+_GRAM_NEED = tuple(_min_shared_bigrams(m, FUZZY_THRESHOLD) for m in range(128))
+
+
+def _gram_need(m: int) -> int:
+    """Πόσα κοινά bigrams χρειάζεται (τουλάχιστον) ένα ζεύγος με min μήκος m."""
+    return _GRAM_NEED[m] if m < len(_GRAM_NEED) else _min_shared_bigrams(m, FUZZY_THRESHOLD)
+
+
+def _open_fuzzy_candidates(ruleset: CompiledRuleset, q: str, hits: FrozenSet[str]) -> List[str]:
+    """
+    match_any terms των rules χωρίς match_all που ΜΠΟΡΕΙ να περάσουν το fuzzy threshold.
+
+    Αντί για prefilter + partial_ratio σε όλα τα terms: inverted index bigram -> terms
+    και count filter (_gram_need), exact (ίδια αποτελέσματα με το πλήρες scan).
+    Το μέτρημα γίνεται σε C (Counter) πάνω στα postings των bigrams της ερώτησης.
+
+    Όριο: το φράγμα είναι χαλαρό για μικρά terms (threshold 78 => ~1-2 κοινά bigrams για
+    terms 5-9 χαρακτήρων), οπότε περνούν όσα terms μοιράζονται bigrams με την ερώτηση
+    και το κόστος εξακολουθεί να μεγαλώνει με το ruleset (~3x λιγότερο από το πλήρες scan,
+    όχι σταθερό). Σταθερό latency θέλει approximate fuzzy στάδιο (διαφορετικά αποτελέσματα).
+    """
+    terms = ruleset.open_any_terms
+    if not terms:
+        return []
+
+    q_len = len(q)
+    if _gram_need(q_len) <= 0:
+        # πολύ μικρή ερώτηση: το φράγμα δεν αποκλείει τίποτα
+        return [t for t in terms if t not in hits]
+
+    # κοινά bigrams (άνω φράγμα: πλήθος στο q x πλήθος στο term ανά bigram)
+    shared: Counter = Counter()
+    postings = ruleset.open_gram_postings
+    for g, n in Counter(_bigrams(q)).items():
+        ix = postings.get(g)
+        if ix:
+            shared.update(ix * n if n > 1 else ix)
+
+    out = [terms[i] for i in ruleset.open_short_terms]
+    for i, n in shared.items():
+        t = terms[i]
+        if n >= _gram_need(min(q_len, len(t))):
+            out.append(t)
+    return [t for t in out if t not in hits]
+
+
+def _fuzzy_hits(
+    q: str,
+    terms: Iterable[str],
+    threshold: float = FUZZY_THRESHOLD,
+    term_grams: Optional[Dict[str, Dict[str, int]]] = None,
+    screened: Iterable[str] = (),
+) -> FrozenSet[str]:
+    """
+    Batched fuzzy matching: επιστρέφει όσα terms έχουν partial_ratio(q, t) >= threshold.
+
+    1) n-gram prefilter: πετάμε terms που δεν μπορούν να φτάσουν το threshold
+       (όχι για τα `screened`: έχουν ήδη περάσει το bigram count filter)
+    2) ένα rapidfuzz call (C loop) για όλα τα υπόλοιπα, με score_cutoff
+    """
+    if not q:
+        return frozenset()
+
+    q_grams = _grams(q)
+    q_len = len(q)
+    candidates: List[str] = list(set(screened))
+    seen = set(candidates)
+    for t in set(terms):
+        if t in seen:
+            continue
+        if not t:
+            continue
+        t_grams = term_grams.get(t) if term_grams else None
+        if t_grams is None:
+            t_grams = _grams(t)
+        if _may_reach(q_grams, q_len, t, t_grams, threshold):
+            candidates.append(t)
+
+    if not candidates:
+        return frozenset()
+
+    scored = process.extract(
+        q,
+        candidates,
+        scorer=fuzz.partial_ratio,
+        processor=None,
+        score_cutoff=threshold,
+        limit=None,
+    )
+    return frozenset(choice for choice, _score, _idx in scored)
+
+
+def _fuzzy_any(q: str, terms: List[str], threshold: int = FUZZY_THRESHOLD) -> bool:
     """
     Fuzzy matching για να πιάνει μικρά λάθη:
     - "απουσιεσ" ~ "απουσιες"
     Χρησιμοποιούμε partial_ratio γιατί δουλεύει καλά όταν το keyword
     βρίσκεται μέσα σε μεγαλύτερη πρόταση.
     """
-    for t in terms:
-        if not t:
-            continue
-        if fuzz.partial_ratio(q, t) >= threshold:
-            return True
-    return False
+    return bool(_fuzzy_hits(q, terms, threshold=threshold))
 
 
-def decide(org_type: str, question: str) -> Dict[str, Any]:
+def _select_rule(ruleset: CompiledRuleset, q: str) -> Tuple[Optional[CompiledRule], Dict[str, Any]]:
     """
-    Returns:
-    {
-      "decision": "...",
-      "rule_id": "...",
-      "confidence": 0.9,
-      "answer": "...",
-      "actions": [...],
-    }
+    Επιλέγει το καλύτερο rule για την (normalized) ερώτηση.
+    Pure function του (ruleset, q) => ασφαλές για caching.
     """
-    q_raw = question or ""
-    q = _norm(q_raw)
+    rules = ruleset.rules
 
-    ruleset = _load_ruleset(org_type)
-    rules: List[Dict[str, Any]] = ruleset.get("rules", [])
+    # Ένα πέρασμα στην ερώτηση => όλα τα strict hits για όλα τα rules
+    hits = ruleset.matcher.find(q)
 
-    best_rule: Optional[Dict[str, Any]] = None
+    best_rule: Optional[CompiledRule] = None
     best_score = -1
     best_conf = 0.0
     best_debug: Dict[str, Any] = {}
 
-    for rule in rules:
-        match_any = [_norm(x) for x in rule.get("match_any", []) if str(x).strip()]
-        match_all = [_norm(x) for x in rule.get("match_all", []) if str(x).strip()]
+    # 1) υποψήφια rules από το inverted index: όσα έχουν hit + όσα δεν έχουν terms
+    #    (ένα rule χωρίς κανένα strict hit μπορεί να περάσει μόνο με fuzzy, βλ. 2)
+    candidates = set(ruleset.open_rules)
+    for t in hits:
+        candidates.update(ruleset.term_rules.get(t, ()))
 
+    gated: Dict[int, Tuple[CompiledRule, bool, bool]] = {}
+    fuzzy_pending: List[str] = []
+    for i in candidates:
+        cr = rules[i]
         # Hard gate: match_all πρέπει να περνάει (αν υπάρχει)
-        all_ok = (not match_all) or _contains_all(q, match_all)
+        all_ok = (not cr.match_all) or _contains_all(hits, cr.match_all)
+        if not all_ok:
+            continue
 
         # match_any μπορεί να περάσει strict ή fuzzy
-        any_strict_ok = (not match_any) or _contains_any(q, match_any)
+        any_strict_ok = (not cr.match_any) or _contains_any(hits, cr.match_any)
+        if not any_strict_ok:
+            fuzzy_pending.extend(cr.match_any)
+        gated[i] = (cr, all_ok, any_strict_ok)
+
+    # 2) fuzzy fallback: ένα batched call για τα match_any terms των rules που δεν
+    #    πέρασαν strict + των rules χωρίς match_all (αυτά δεν φαίνονται στο strict index:
+    #    υποψήφια μόνο όσα έχουν αρκετά κοινά bigrams με την ερώτηση)
+    open_pending = _open_fuzzy_candidates(ruleset, q, hits)
+    fuzzy_hits: FrozenSet[str] = frozenset()
+    if fuzzy_pending or open_pending:
+        fuzzy_hits = _fuzzy_hits(
+            q, fuzzy_pending, threshold=FUZZY_THRESHOLD, term_grams=ruleset.term_grams, screened=open_pending,
+        )
+
+    for t in fuzzy_hits:
+        for i in ruleset.any_term_rules.get(t, ()):
+            if i in gated:
+                continue
+            cr = rules[i]
+            if cr.match_all and not _contains_all(hits, cr.match_all):
+                continue
+            gated[i] = (cr, True, False)
+
+    # 3) scoring (σε σειρά JSON => ίδιο tie-break με πριν)
+    for i in sorted(gated):
+        cr, all_ok, any_strict_ok = gated[i]
+        match_any = cr.match_any
+        match_all = cr.match_all
+
         any_fuzzy_ok = False
-        if not any_strict_ok and match_any:
-            any_fuzzy_ok = _fuzzy_any(q, match_any, threshold=78)
+        if not any_strict_ok:
+            any_fuzzy_ok = any(t in fuzzy_hits for t in match_any)
 
-        eligible = all_ok and (any_strict_ok or any_fuzzy_ok)
+        eligible = any_strict_ok or any_fuzzy_ok
         if not eligible:
             continue
 
@@ -145,33 +543,51 @@ def decide(org_type: str, question: str) -> Dict[str, Any]:
         # match_all => πιο ισχυρό
         if match_all:
             score += 40
-            score += 10 * sum(1 for t in match_all if t in q)
+            score += 10 * sum(1 for t in match_all if t in hits)
 
         # match_any => επίσης σημαντικό
         if match_any:
             score += 30
-            score += 5 * sum(1 for t in match_any if t in q)
+            score += 5 * sum(1 for t in match_any if t in hits)
             if any_fuzzy_ok:
                 score += 10  # bonus για fuzzy hit
 
         # confidence tie-breaker
-        conf = float(rule.get("confidence", 0.8))
+        conf = cr.confidence
 
         if score > best_score or (score == best_score and conf > best_conf):
             best_score = score
             best_conf = conf
-            best_rule = rule
+            best_rule = cr
             best_debug = {
                 "normalized_question": q,
-                "match_any": match_any,
-                "match_all": match_all,
+                "match_any": list(match_any),
+                "match_all": list(match_all),
                 "all_ok": all_ok,
                 "any_strict_ok": any_strict_ok,
                 "any_fuzzy_ok": any_fuzzy_ok,
                 "score": score,
             }
 
-    if best_rule:
+    if best_rule is None:
+        best_debug = {"normalized_question": q, "org_type": ruleset.org_type, "rules_loaded": len(rules)}
+
+    return best_rule, best_debug
+
+
+def _select_cached(ruleset: CompiledRuleset, q: str) -> Tuple[Optional[CompiledRule], Dict[str, Any]]:
+    # Το version_id αλλάζει με το περιεχόμενο του ruleset => αυτόματο invalidation
+    key = (ruleset.org_type, ruleset.version_id, q)
+    selected = _DECISION_CACHE.get(key)
+    if selected is None:
+        selected = _select_rule(ruleset, q)
+        _DECISION_CACHE.set(key, selected)
+    return selected
+
+
+def _build_result(ruleset: CompiledRuleset, best: Optional[CompiledRule], best_debug: Dict[str, Any]) -> Dict[str, Any]:
+    if best is not None:
+        best_rule = best.rule
         decision = best_rule.get("decision") or best_rule.get("intent") or best_rule.get("id")
 
         return {
@@ -180,8 +596,9 @@ def decide(org_type: str, question: str) -> Dict[str, Any]:
             "confidence": best_rule.get("confidence", 0.8),
             "answer": best_rule.get("answer", ""),
             "actions": best_rule.get("actions", []),
+            "ruleset_version": ruleset.version_id,
             # dev-only (αν σε ενοχλεί, σβήσ’το)
-            "_debug": best_debug,
+            "_debug": dict(best_debug),
         }
 
     return {
@@ -190,5 +607,53 @@ def decide(org_type: str, question: str) -> Dict[str, Any]:
         "confidence": 0.2,
         "answer": "Δεν υπάρχει καταγεγραμμένος κανόνας για αυτό το αίτημα.",
         "actions": [],
-        "_debug": {"normalized_question": q, "org_type": (org_type or "").strip().lower(), "rules_loaded": len(rules)},
+        "ruleset_version": ruleset.version_id,
+        "_debug": dict(best_debug),
+    }
+
+
+def decide(org_type: str, question: str) -> Dict[str, Any]:
+    """
+    Returns:
+    {
+      "decision": "...",
+      "rule_id": "...",
+      "confidence": 0.9,
+      "answer": "...",
+      "actions": [...],
     }
+    """
+    q_raw = question or ""
+    # cached (LRU) normalization: οι ίδιες ερωτήσεις έρχονται ξανά και ξανά
+    q = normalize_question(q_raw).text
+
+    ruleset = _load_ruleset(org_type)
+    return _build_result(ruleset, *_select_cached(ruleset, q))
+
+
+def decide_many(org_type: str, questions: List[str]) -> List[Dict[str, Any]]:
+    """
+    Batch εκδοχή του decide() (ίδιο αποτέλεσμα ανά ερώτηση):
+    - ένα ruleset snapshot για όλο το batch (ίδιο version σε όλα τα items)
+    - κάθε μοναδική normalized ερώτηση γίνεται match μία φορά (τοπικό dedup)
+    - ΔΕΝ περνά από τα κοινά caches (normalize_question LRU, _DECISION_CACHE):
+      ένα nightly replay δεκάδων χιλιάδων ερωτήσεων θα έδιωχνε τα hot entries
+      της live κίνησης
+
+    Δεν υπάρχει "vectorized" πέρασμα όλων των ερωτήσεων μαζί: κάθε στάδιο είναι ήδη
+    batched ανά ερώτηση (ένα Aho-Corasick πέρασμα, ένα rapidfuzz call για τα
+    υποψήφια terms της). Ένα process.cdist για όλο το batch θα έκανε score την ένωση
+    των υποψηφίων κάθε ερώτησης απέναντι σε ΟΛΕΣ τις ερωτήσεις, δηλαδή πολύ περισσότερη δουλειά.
+    """
+    ruleset = _load_ruleset(org_type)
+
+    selected: Dict[str, Tuple[Optional[CompiledRule], Dict[str, Any]]] = {}
+    results: List[Dict[str, Any]] = []
+    for question in questions:
+        q = normalize_el(question or "")
+        picked = selected.get(q)
+        if picked is None:
+            picked = selected[q] = _select_rule(ruleset, q)
+        results.append(_build_result(ruleset, *picked))
+
+    return results
@@ -0,0 +1,353 @@
+"""
+search_index.py
+
+Full-text index των documents, ένα SQLite FTS5 αρχείο ανά tenant:
+
+    <DOC_INDEX_DIR>/<tenant_id>.fts
+
+- partitioning ανά tenant: κάθε query αγγίζει μόνο το index του tenant του
+  (μικρότερα posting lists, καμία πιθανότητα να "δει" documents άλλου tenant,
+  διαγραφή tenant = σβήσιμο ενός αρχείου)
+- ίδιο normalization με τους κανόνες (text.normalize_el) και για το κείμενο και για
+  το query => "Αλλαγή Τμήματος" βρίσκει "αλλαγη τμηματος", "ΑΛΛΑΓΗ", κ.λπ.
+  (normalize_el και όχι normalize_question: μεγάλα κείμενα δεν πρέπει να μπαίνουν στο LRU cache)
+- ranking: bm25 (το όνομα του αρχείου μετράει περισσότερο από το σώμα),
+  snippets από το FTS5 snippet() πάνω στο normalized κείμενο
+
+Ingestion (DocumentIndexer): το upload δεν περιμένει το indexing.
+Μετά το commit του document μπαίνει ένα job σε ΕΝΑ background thread ανά process:
+extraction κειμένου -> normalize -> INSERT στο FTS5 του tenant (incremental, ένα
+transaction ανά document). Ένα thread => τα jobs εκτελούνται με τη σειρά που
+μπήκαν (ένα delete δεν "προλαβαίνει" το index του ίδιου document) και δεν
+ανταγωνίζονται για το write lock του ίδιου αρχείου.
+
+Extraction: .txt/.md/.csv/.tsv/.json (UTF-8, αλλιώς cp1253), .docx (zip + XML, stdlib),
+.pdf μόνο αν είναι εγκατεστημένο το pypdf. Για τα υπόλοιπα γίνεται index μόνο το όνομα.
+
+Πλήρες rebuild από τον πίνακα documents (π.χ. για documents πριν από το index):
+    python -m app.services.search_index reindex [--tenant <tenant_id>]
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from xml.etree import ElementTree
+
+from sqlalchemy import select
+
+from app import db as app_db
+from app.models import Document
+from app.services.text import normalize_el
+
+try:  # προαιρετικό: χωρίς αυτό τα PDF γίνονται index μόνο με το όνομα
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover
+    PdfReader = None
+
+log = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent  # .../backend
+DOC_INDEX_DIR = Path(os.getenv("DOC_INDEX_DIR", str(BASE_DIR / "data" / "search")))
+
+# Πόσα bytes κειμένου διαβάζουμε ανά αρχείο (το υπόλοιπο δεν γίνεται index)
+DOC_INDEX_MAX_BYTES = int(os.getenv("DOC_INDEX_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Μέγεθος snippet σε tokens
+DOC_SEARCH_SNIPPET_TOKENS = int(os.getenv("DOC_SEARCH_SNIPPET_TOKENS", "16"))
+
+# bm25 βάρη: (name, body)
+_RANK = "bm25(4.0, 1.0)"
+
+_TEXT_EXTS = {".txt", ".md", ".csv", ".tsv", ".json"}
+_DOCX_TEXT = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t"
+_DOCX_PARAGRAPH = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}p"
+
+_SCHEMA = (
+    # doc_id -> rowid του FTS (delete / re-index χωρίς scan) + όνομα για εμφάνιση
+    "CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, doc_id TEXT NOT NULL UNIQUE, name TEXT NOT NULL)",
+    # το κείμενο είναι ήδη normalized (lower, χωρίς τόνους/στίξη): ο tokenizer απλά σπάει σε κενά.
+    # prefix index => φθηνά prefix queries ("τμημ*")
+    "CREATE VIRTUAL TABLE IF NOT EXISTS doc_fts USING fts5("
+    "name, body, tokenize='unicode61 remove_diacritics 0', prefix='2 3')",
+)
+
+
+# -------------------------
+# Extraction
+# -------------------------
+def _decode(raw: bytes) -> str:
+    try:
+        return raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # παλιά ελληνικά αρχεία Windows; κομμένο multi-byte στο όριο => replace
+        return codecs.decode(raw, "cp1253", errors="replace")
+
+
+def _read_text(path: Path, max_bytes: int) -> str:
+    with open(path, "rb") as f:
+        return _decode(f.read(max_bytes))
+
+
+def _read_docx(path: Path, max_bytes: int) -> str:
+    parts: List[str] = []
+    size = 0
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as xml:
+        # iterparse: δεν χτίζουμε όλο το δέντρο στη μνήμη
+        for _event, el in ElementTree.iterparse(xml):
+            if el.tag == _DOCX_TEXT and el.text:
+                parts.append(el.text)
+                size += len(el.text)
+            elif el.tag == _DOCX_PARAGRAPH:
+                parts.append("\n")
+                el.clear()
+            if size >= max_bytes:
+                break
+    return "".join(parts)
+
+
+def _read_pdf(path: Path, max_bytes: int) -> str:
+    if PdfReader is None:
+        return ""
+    parts: List[str] = []
+    size = 0
+    for page in PdfReader(str(path)).pages:
+        text = page.extract_text() or ""
+        parts.append(text)
+        size += len(text)
+        if size >= max_bytes:
+            break
+    return "\n".join(parts)
+
+
+def extract_text(path: Path, max_bytes: int = DOC_INDEX_MAX_BYTES) -> str:
+    """Κείμενο του αρχείου (ή "" αν ο τύπος δεν υποστηρίζεται)."""
+    ext = path.suffix.lower()
+    if ext in _TEXT_EXTS:
+        return _read_text(path, max_bytes)
+    if ext == ".docx":
+        return _read_docx(path, max_bytes)
+    if ext == ".pdf":
+        return _read_pdf(path, max_bytes)
+    return ""
+
+
+# -------------------------
+# Index ανά tenant
+# -------------------------
+def index_path(tenant_id: str) -> Path:
+    return DOC_INDEX_DIR / f"{tenant_id}.fts"
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _open_for_write(tenant_id: str) -> sqlite3.Connection:
+    path = index_path(tenant_id)
+    created = not path.exists()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = _connect(path)
+    # WAL (persistent στο αρχείο) => οι αναζητήσεις δεν μπλοκάρουν όσο γίνεται indexing
+    conn.execute("PRAGMA journal_mode=WAL")
+    # IF NOT EXISTS σε κάθε open: άλλο process μπορεί να δημιούργησε το αρχείο ταυτόχρονα
+    for ddl in _SCHEMA:
+        conn.execute(ddl)
+    if created:
+        # default ranking του πίνακα => `ORDER BY rank` χωρίς bm25(...) σε κάθε query
+        conn.execute("INSERT INTO doc_fts(doc_fts, rank) VALUES ('rank', ?)", (_RANK,))
+    return conn
+
+
+def _delete(conn: sqlite3.Connection, doc_id: str) -> bool:
+    row = conn.execute("SELECT id FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+    if row is None:
+        return False
+    conn.execute("DELETE FROM doc_fts WHERE rowid = ?", row)
+    conn.execute("DELETE FROM documents WHERE id = ?", row)
+    return True
+
+
+def index_document(tenant_id: str, doc_id: str, name: str, path: Path) -> bool:
+    """
+    Extraction + normalize + index ενός document (αντικαθιστά τυχόν παλιά εγγραφή).
+    False αν το αρχείο δεν υπάρχει πια (π.χ. διαγράφηκε πριν φτάσει η σειρά του).
+    """
+    try:
+        body = normalize_el(extract_text(path))
+    except FileNotFoundError:
+        return False
+
+    conn = _open_for_write(tenant_id)
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            _delete(conn, doc_id)
+            rowid = conn.execute("INSERT INTO documents (doc_id, name) VALUES (?, ?)", (doc_id, name)).lastrowid
+            conn.execute(
+                "INSERT INTO doc_fts (rowid, name, body) VALUES (?, ?, ?)",
+                (rowid, normalize_el(name), body),
+            )
+    finally:
+        conn.close()
+    return True
+
+
+def remove_document(tenant_id: str, doc_id: str) -> bool:
+    if not index_path(tenant_id).exists():
+        return False
+    conn = _open_for_write(tenant_id)
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return _delete(conn, doc_id)
+    finally:
+        conn.close()
+
+
+def _match_query(q: str) -> Optional[str]:
+    # Μετά το normalize_el τα tokens είναι μόνο [0-9a-zα-ω]: ασφαλή μέσα σε "..."
+    tokens = normalize_el(q).split()
+    if not tokens:
+        return None
+    # AND όλων των όρων, prefix στον τελευταίο (αναζήτηση όσο πληκτρολογεί ο χρήστης)
+    return " ".join(f'"{t}"' for t in tokens) + "*"
+
+
+def search(tenant_id: str, q: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Τα `limit` πιο σχετικά documents του tenant (bm25), με snippet από το σώμα."""
+    match = _match_query(q)
+    path = index_path(tenant_id)
+    if match is None or not path.exists():
+        return []
+
+    conn = _connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT d.doc_id, d.name, snippet(doc_fts, 1, '<mark>', '</mark>', '…', ?), rank"
+            " FROM doc_fts JOIN documents d ON d.id = doc_fts.rowid"
+            " WHERE doc_fts MATCH ? ORDER BY rank LIMIT ?",
+            (DOC_SEARCH_SNIPPET_TOKENS, match, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    # το bm25 του FTS5 είναι αρνητικό (μικρότερο = καλύτερο): score > 0 για τους clients.
+    # Χωρίς στρογγυλοποίηση: για όρους που υπάρχουν στα μισά+ docs το idf είναι ~1e-6
+    # και ένα round θα έδινε 0.0 σε όλα τα αποτελέσματα.
+    return [
+        {"doc_id": doc_id, "original_name": name, "snippet": snippet, "score": -rank}
+        for doc_id, name, snippet, rank in rows
+    ]
+
+
+# -------------------------
+# Background ingestion
+# -------------------------
+class DocumentIndexer:
+    """
+    Ένα worker thread ανά process: τα jobs (index/remove) εκτελούνται με σειρά υποβολής.
+    Αποτυχία indexing δεν επηρεάζει το upload: γίνεται log και μετράει στο stats().
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._done = 0
+        self._failed = 0
+
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="doc-index")
+            self._pending += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future: Future) -> None:
+        error = future.exception()
+        with self._lock:
+            self._pending -= 1
+            if error is None:
+                self._done += 1
+            else:
+                self._failed += 1
+        if error is not None:
+            log.error("document indexing failed", exc_info=error)
+
+    def add(self, tenant_id: str, doc_id: str, name: str, path: Path) -> Future:
+        return self._submit(index_document, tenant_id, doc_id, name, path)
+
+    def remove(self, tenant_id: str, doc_id: str) -> Future:
+        return self._submit(remove_document, tenant_id, doc_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": self._pending, "done": self._done, "failed": self._failed}
+
+
+INDEXER = DocumentIndexer()
+
+
+# -------------------------
+# CLI: rebuild από τον πίνακα documents
+# -------------------------
+def _documents(tenant_id: Optional[str]) -> Iterable[Any]:
+    stmt = select(Document.tenant_id, Document.id, Document.original_name, Document.path).order_by(
+        Document.tenant_id, Document.created_at
+    )
+    if tenant_id:
+        stmt = stmt.where(Document.tenant_id == tenant_id)
+    with app_db.engine.connect() as conn:
+        yield from conn.execute(stmt)
+
+
+def _drop_index(tenant_id: str) -> None:
+    path = index_path(tenant_id)
+    for f in (path, path.with_name(path.name + "-wal"), path.with_name(path.name + "-shm")):
+        f.unlink(missing_ok=True)
+
+
+def reindex(tenant_id: Optional[str] = None) -> Dict[str, int]:
+    """Πλήρες rebuild (ενός ή όλων των tenants) από καθαρά αρχεία index."""
+    if tenant_id:
+        _drop_index(tenant_id)
+    else:
+        for path in DOC_INDEX_DIR.glob("*.fts"):
+            _drop_index(path.stem)
+
+    indexed = missing = 0
+    for doc in _documents(tenant_id):
+        if index_document(doc.tenant_id, doc.id, doc.original_name, Path(doc.path)):
+            indexed += 1
+        else:
+            missing += 1
+    return {"indexed": indexed, "missing_files": missing}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Full-text index των documents")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("reindex", help="rebuild από τον πίνακα documents")
+    p.add_argument("--tenant", default=None)
+    args = parser.parse_args(argv)
+
+    print(reindex(args.tenant))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+storage.py
+
+Αποθήκευση uploaded αρχείων στο filesystem χωρίς να φορτώνεται ολόκληρο το αρχείο στη μνήμη.
+
+- αντιγραφή σε fixed-size chunks (UPLOAD_CHUNK_SIZE) σε temp αρχείο στον ίδιο φάκελο
+- sha256 + μέγεθος υπολογίζονται on the fly
+- όριο μεγέθους (UPLOAD_MAX_BYTES): η αντιγραφή σταματά μόλις ξεπεραστεί
+- atomic rename (os.replace) στη θέση του blob μόνο όταν όλα πήγαν καλά
+
+Content-addressed blob store (BlobStore):
+- κάθε περιεχόμενο αποθηκεύεται ΜΙΑ φορά: <root>/<sha[:2]>/<sha[2:4]>/<sha256>
+- οι αναφορές ανά tenant (uploads/<tenant_id>/<doc>) είναι hardlinks στο blob:
+  ίδιο αρχείο στο δίσκο, ίδιο path layout για όσους διαβάζουν τα documents
+- reference count = st_nlink - 1 (το κρατά το filesystem, επιβιώνει restarts και
+  είναι κοινό για όλα τα worker processes)
+- release: σβήνει την αναφορά και το blob μόλις δεν έχει άλλες αναφορές
+Duplicate upload => hashing + ένα link (καμία εγγραφή δεδομένων, αν το src είναι seekable).
+
+Όλη η αντιγραφή είναι blocking I/O: οι async callers την τρέχουν σε thread
+(asyncio.to_thread) ώστε να μη "παγώνει" το event loop.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Tuple
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Πρέπει να είναι στο ίδιο filesystem με τα uploads (hardlinks), αλλιώς γίνεται copy χωρίς dedup
+BLOB_ROOT = Path(os.getenv("BLOB_ROOT", "blobs"))
+
+
+class UploadTooLarge(ValueError):
+    """Το αρχείο ξεπερνά το UPLOAD_MAX_BYTES (=> 413 στις routes)."""
+
+
+class StoredBlob(NamedTuple):
+    path: Path  # η αναφορά του tenant (hardlink στο blob)
+    sha256: str
+    size: int
+    deduplicated: bool  # True => το περιεχόμενο υπήρχε ήδη, γράφτηκε μόνο η αναφορά
+
+
+def _hash_only(src: BinaryIO, max_bytes: int, chunk_size: int) -> Tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"File too large (max {max_bytes} bytes)")
+        digest.update(chunk)
+    return digest.hexdigest(), size
+
+
+def _copy_to_temp(src: BinaryIO, directory: Path, max_bytes: int, chunk_size: int) -> Tuple[Path, str, int]:
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f".upload-{uuid.uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(tmp, "wb") as out:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File too large (max {max_bytes} bytes)")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    return tmp, digest.hexdigest(), size
+
+
+# -------------------------
+# Content-addressed blob store
+# -------------------------
+class BlobStore:
+    def __init__(self, root: Path):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def _link(self, blob: Path, ref: Path) -> None:
+        try:
+            os.link(blob, ref)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            # π.χ. διαφορετικό filesystem / χωρίς hardlinks: λειτουργεί, αλλά χωρίς dedup
+            shutil.copyfile(blob, ref)
+
+    def add(
+        self,
+        src: BinaryIO,
+        ref: Path,
+        max_bytes: int = UPLOAD_MAX_BYTES,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+    ) -> StoredBlob:
+        """
+        Hash + αποθήκευση του src (αν δεν υπάρχει ήδη) και δημιουργία της αναφοράς `ref`.
+        Αν ξεπεραστεί το max_bytes => UploadTooLarge και δεν μένει τίποτα στο δίσκο.
+        """
+        ref.parent.mkdir(parents=True, exist_ok=True)
+
+        if src.seekable():
+            # 1ο πέρασμα μόνο hashing: αν το περιεχόμενο υπάρχει ήδη => μόνο link
+            start = src.tell()
+            sha256, size = _hash_only(src, max_bytes, chunk_size)
+            with self._lock:
+                try:
+                    self._link(self.blob_path(sha256), ref)
+                    return StoredBlob(path=ref, sha256=sha256, size=size, deduplicated=True)
+                except FileNotFoundError:
+                    pass
+            src.seek(start)
+
+        tmp, sha256, size = _copy_to_temp(src, self.root / "tmp", max_bytes, chunk_size)
+        blob = self.blob_path(sha256)
+
+        try:
+            with self._lock:
+                try:
+                    # υπάρχον blob: η αναφορά κρατά ζωντανό το inode ακόμα κι αν
+                    # άλλο process κάνει ταυτόχρονα release
+                    self._link(blob, ref)
+                    deduplicated = True
+                except FileNotFoundError:
+                    blob.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tmp, blob)
+                    self._link(blob, ref)
+                    deduplicated = False
+        finally:
+            tmp.unlink(missing_ok=True)
+
+        return StoredBlob(path=ref, sha256=sha256, size=size, deduplicated=deduplicated)
+
+    def refcount(self, sha256: str) -> int:
+        try:
+            return self.blob_path(sha256).stat().st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def release(self, sha256: str, ref: Path) -> bool:
+        """Σβήνει την αναφορά. Επιστρέφει True αν σβήστηκε και το blob (καμία άλλη αναφορά)."""
+        blob = self.blob_path(sha256)
+        with self._lock:
+            ref.unlink(missing_ok=True)
+            try:
+                if blob.stat().st_nlink > 1:
+                    return False
+                blob.unlink()
+            except FileNotFoundError:
+                return False
+        return True
@@ -0,0 +1,201 @@
+"""
+tenant_data.py
+
+Providers για τα business δεδομένα ενός tenant (students, finance, absences, limits).
+
+Ίδιο contract με το mock_db:
+- get_tenant_db(tenant_id) -> {"students": {...}, "finance": {...}, "absences": {...}, "limits": {...}}
+- fetch_records(tenant_id, entity, keys) -> {key: record}   (batched, για τον TenantDataLoader)
+
+Provider ανά env TENANT_DATA_PROVIDER:
+- "mock" (default): app/services/mock_db.py (demo / MVP)
+- "sql": πίνακες tenant_* μέσω SQLAlchemy (pooled engine) + read-through cache
+  με TTL ανά πίνακα (π.χ. τα limits αλλάζουν σπάνια => μεγάλο TTL)
+- "columnar": mmap αρχείο ανά tenant (app/services/columnar_store.py) για μεγάλα datasets
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Table, delete, insert, select
+from sqlalchemy.engine import Engine
+
+from app import db as app_db
+from app.models import AbsenceRecord, FinanceRecord, StudentRecord, TenantLimit
+from app.services import columnar_store, mock_db
+from app.services.cache import TTLCache
+
+TENANT_DATA_PROVIDER = os.getenv("TENANT_DATA_PROVIDER", "mock").strip().lower()
+
+# Ξεχωριστή DB για τα business data (π.χ. read replica). Αν λείπει => app.db.engine
+TENANT_DATA_URL = os.getenv("TENANT_DATA_URL", "")
+
+# Πόσα keys ανά `IN (...)` query
+_IN_CHUNK = 500
+
+_MISSING = object()
+
+
+# -------------------------
+# Table specs: entity -> (table, key column, row -> record)
+# -------------------------
+_TableSpec = Tuple[Table, str, Callable[[Any], Any]]
+
+_TABLES: Dict[str, _TableSpec] = {
+    "students": (StudentRecord.__table__, "student_id", lambda r: {"name": r.name, "status": r.status}),
+    "finance": (FinanceRecord.__table__, "student_id", lambda r: {"balance_eur": r.balance_eur}),
+    "absences": (AbsenceRecord.__table__, "student_id", lambda r: {"total": r.total}),
+    "limits": (TenantLimit.__table__, "key", lambda r: r.value),
+}
+
+# TTL (seconds) ανά πίνακα: TENANT_DATA_TTL_<ENTITY> για override
+_DEFAULT_TTLS = {"students": 60.0, "finance": 30.0, "absences": 30.0, "limits": 3600.0}
+TENANT_DATA_CACHE_SIZE = int(os.getenv("TENANT_DATA_CACHE_SIZE", "50000"))
+
+_CACHES: Dict[str, TTLCache[Any]] = {
+    entity: TTLCache(
+        maxsize=TENANT_DATA_CACHE_SIZE,
+        ttl=float(os.getenv(f"TENANT_DATA_TTL_{entity.upper()}", str(ttl))),
+    )
+    for entity, ttl in _DEFAULT_TTLS.items()
+}
+
+
+_ENGINE: Optional[Engine] = None
+
+
+def _engine() -> Engine:
+    """Pooled engine: το app engine ή ξεχωριστό (TENANT_DATA_URL, ρυθμίσεις TENANT_DATA_POOL_* κ.λπ.)."""
+    global _ENGINE
+    if _ENGINE is None:
+        if TENANT_DATA_URL:
+            _ENGINE = app_db.build_engine(TENANT_DATA_URL, prefix="TENANT_DATA")
+        else:
+            _ENGINE = app_db.engine
+    return _ENGINE
+
+
+# -------------------------
+# SQL provider
+# -------------------------
+def _sql_fetch(tenant_id: str, entity: str, keys: List[str]) -> Dict[str, Any]:
+    table, key_col, to_record = _TABLES[entity]
+    col = table.c[key_col]
+    found: Dict[str, Any] = {}
+    with _engine().connect() as conn:
+        for i in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[i:i + _IN_CHUNK]
+            stmt = select(table).where(table.c.tenant_id == tenant_id, col.in_(chunk))
+            for row in conn.execute(stmt):
+                found[getattr(row, key_col)] = to_record(row)
+    return found
+
+
+def sql_fetch_records(tenant_id: str, entity: str, keys: Iterable[str]) -> Dict[str, Any]:
+    """Read-through: πρώτα cache (και negative entries), μετά ένα query για τα υπόλοιπα."""
+    if entity not in _TABLES:
+        return {}
+
+    cache = _CACHES[entity]
+    out: Dict[str, Any] = {}
+    missing: List[str] = []
+    for k in dict.fromkeys(keys):
+        v = cache.get((tenant_id, k), _MISSING)
+        if v is _MISSING:
+            missing.append(k)
+        elif v is not None:
+            out[k] = v
+
+    if missing:
+        found = _sql_fetch(tenant_id, entity, missing)
+        for k in missing:
+            v = found.get(k)
+            cache.set((tenant_id, k), v)  # None => "δεν υπάρχει" (negative cache)
+            if v is not None:
+                out[k] = v
+
+    return out
+
+
+class _TableView(Mapping):
+    """Lazy, dict-like view ενός πίνακα για ένα tenant (lookups μέσω cache)."""
+
+    def __init__(self, tenant_id: str, entity: str):
+        self._tenant_id = tenant_id
+        self._entity = entity
+
+    def __getitem__(self, key: str) -> Any:
+        found = sql_fetch_records(self._tenant_id, self._entity, [key])
+        if key not in found:
+            raise KeyError(key)
+        return found[key]
+
+    def __iter__(self) -> Iterator[str]:
+        table, key_col, _ = _TABLES[self._entity]
+        stmt = select(table.c[key_col]).where(table.c.tenant_id == self._tenant_id)
+        with _engine().connect() as conn:
+            return iter([r[0] for r in conn.execute(stmt)])
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def sql_get_tenant_db(tenant_id: str) -> Dict[str, Any]:
+    return {entity: _TableView(tenant_id, entity) for entity in _TABLES}
+
+
+def invalidate(tenant_id: str, entity: Optional[str] = None, key: Optional[str] = None) -> None:
+    """Μετά από writes: καθαρίζει cached records του tenant (ένα key, ένα entity ή όλα)."""
+    for name, cache in _CACHES.items():
+        if entity is not None and name != entity:
+            continue
+        if key is not None:
+            cache.pop((tenant_id, key))
+        else:
+            # μόνο τα keys του tenant: οι υπόλοιποι tenants κρατούν ζεστό cache
+            cache.discard_if(lambda k, _v: k[0] == tenant_id)
+
+
+def seed_tenant_data(tenant_id: str, dataset: Dict[str, Any]) -> None:
+    """
+    Γράφει ένα dataset στο schema του MOCK_DB στους πίνακες tenant_*
+    (αντικαθιστά ό,τι υπήρχε για τον tenant). Ένα transaction, executemany ανά πίνακα.
+    """
+    rows: Dict[str, List[Dict[str, Any]]] = {
+        "students": [{"tenant_id": tenant_id, "student_id": k, **v} for k, v in dataset.get("students", {}).items()],
+        "finance": [{"tenant_id": tenant_id, "student_id": k, **v} for k, v in dataset.get("finance", {}).items()],
+        "absences": [{"tenant_id": tenant_id, "student_id": k, **v} for k, v in dataset.get("absences", {}).items()],
+        "limits": [{"tenant_id": tenant_id, "key": k, "value": v} for k, v in dataset.get("limits", {}).items()],
+    }
+    with _engine().begin() as conn:
+        for entity, (table, _key_col, _) in _TABLES.items():
+            conn.execute(delete(table).where(table.c.tenant_id == tenant_id))
+            if rows[entity]:
+                conn.execute(insert(table), rows[entity])
+    invalidate(tenant_id)
+
+
+# -------------------------
+# Provider dispatch
+# -------------------------
+def get_tenant_db(tenant_id: str) -> Dict[str, Any]:
+    if TENANT_DATA_PROVIDER == "sql":
+        return sql_get_tenant_db(tenant_id)
+    if TENANT_DATA_PROVIDER == "columnar":
+        return columnar_store.columnar_get_tenant_db(tenant_id)
+    return mock_db.get_tenant_db(tenant_id)
+
+
+def fetch_records(tenant_id: str, entity: str, keys: Iterable[str]) -> Dict[str, Any]:
+    if TENANT_DATA_PROVIDER == "sql":
+        return sql_fetch_records(tenant_id, entity, keys)
+    if TENANT_DATA_PROVIDER == "columnar":
+        return columnar_store.columnar_fetch_records(tenant_id, entity, keys)
+    return mock_db.fetch_records(tenant_id, entity, keys)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {entity: cache.stats() for entity, cache in _CACHES.items()}
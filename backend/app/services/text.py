@@ -1,6 +1,61 @@
 # app/services/text.py
-import re
+"""
+Ενιαίο Greek normalization pipeline (κοινό για rules.py και ό,τι άλλο χρειάζεται).
+
+Αντί για NFD + generator ανά χαρακτήρα + NFC + 2 regex, κάνουμε:
+- str.lower() (C-level, σωστό final sigma)
+- ΕΝΑ str.translate() με precomputed πίνακα: χαρακτήρας -> "folded" μορφή
+  (χωρίς τόνους/διαλυτικά, στίξη/σύμβολα -> κενό)
+- split/join για collapse whitespace
+
+Το normalize_question() έχει bounded LRU cache. Τα token boundaries υπολογίζονται
+lazily (μία φορά ανά cached ερώτηση, μόνο αν τα ζητήσει κάποιο στάδιο).
+"""
+
+import os
 import unicodedata
+from functools import cached_property, lru_cache
+from typing import Tuple
+
+# Πόσες (πρόσφατες) ερωτήσεις κρατάμε normalized στη μνήμη
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "4096"))
+
+
+def _allowed(ch: str) -> bool:
+    # keep letters/numbers/spaces (ίδιο με το παλιό [^0-9a-zα-ω\s])
+    return "0" <= ch <= "9" or "a" <= ch <= "z" or "α" <= ch <= "ω"
+
+
+def _fold_char(ch: str) -> str:
+    """Η normalized μορφή ΕΝΟΣ (ήδη lowercase) χαρακτήρα."""
+    if ch.isspace():
+        return " "
+
+    # remove diacritics/tonos
+    t = unicodedata.normalize("NFD", ch)
+    t = "".join(c for c in t if unicodedata.category(c) != "Mn")
+    t = unicodedata.normalize("NFC", t)
+
+    return "".join(c if _allowed(c) else " " for c in t)
+
+
+class _FoldTable(dict):
+    """
+    Translate table: ord(ch) -> folded string.
+    ASCII + ελληνικά είναι precomputed, οι υπόλοιποι χαρακτήρες
+    υπολογίζονται μία φορά την πρώτη φορά που εμφανίζονται.
+    """
+
+    def __missing__(self, key: int) -> str:
+        folded = _fold_char(chr(key))
+        self[key] = folded
+        return folded
+
+
+_TABLE = _FoldTable()
+for _cp in (*range(0x0000, 0x0400), *range(0x1F00, 0x2000)):
+    _TABLE[_cp] = _fold_char(chr(_cp))
+
 
 def normalize_el(text: str) -> str:
     """
@@ -9,18 +64,46 @@ def normalize_el(text: str) -> str:
     - remove tonos/diacritics
     - remove punctuation
     - collapse whitespace
+
+    Έτσι: "Αλλαγή Τμήματος!!!" == "αλλαγη τμηματος"
     """
     if not text:
         return ""
 
-    t = text.strip().lower()
+    return " ".join(text.lower().translate(_TABLE).split())
 
-    # remove diacritics/tonos
-    t = unicodedata.normalize("NFD", t)
-    t = "".join(ch for ch in t if unicodedata.category(ch) != "Mn")
-    t = unicodedata.normalize("NFC", t)
 
-    # keep letters/numbers/spaces
-    t = re.sub(r"[^0-9a-zα-ω\s]", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
+def _spans(t: str) -> Tuple[Tuple[int, int], ...]:
+    # Μετά το normalize_el τα tokens χωρίζονται με ακριβώς ένα κενό
+    spans = []
+    start = 0
+    for tok in t.split(" ") if t else ():
+        end = start + len(tok)
+        spans.append((start, end))
+        start = end + 1
+    return tuple(spans)
+
+
+class NormalizedText:
+    """normalized κείμενο + (lazy) (start, end) ανά token μέσα σε αυτό."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @cached_property
+    def spans(self) -> Tuple[Tuple[int, int], ...]:
+        return _spans(self.text)
+
+    @cached_property
+    def tokens(self) -> Tuple[str, ...]:
+        return tuple(self.text[s:e] for s, e in self.spans)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_question(text: str) -> NormalizedText:
+    """
+    Cached normalize_el για ερωτήσεις (οι ίδιες ερωτήσεις επαναλαμβάνονται συνέχεια).
+    Τα token boundaries (spans / tokens) δεν υπολογίζονται εδώ: ο rule engine δουλεύει
+    πάνω στο .text (Aho-Corasick / fuzzy σε χαρακτήρες), οπότε πληρώνονται μόνο αν ζητηθούν.
+    """
+    return NormalizedText(normalize_el(text))
@@ -0,0 +1,258 @@
+"""
+tokens.py
+
+HS256 JWT sign/verify με keyring ανά `kid` (key id) και rotation.
+
+Γιατί όχι jose.jwt.decode σε κάθε request:
+- ξαναδιαβάζει header, ξαναλύνει τον αλγόριθμο και ξαναχτίζει key object κάθε φορά
+- υποστηρίζει μόνο ένα SECRET_KEY (rotation = logout όλων)
+
+Εδώ:
+- κάθε key κρατά έτοιμο HMAC-SHA256 object (inner/outer pads υπολογισμένα μία φορά),
+  ανά verify κάνουμε μόνο copy() + update()
+- τα header segments (ίδια για όλα τα tokens ενός kid) κρατιούνται parsed σε μικρό cache
+- rotation: νέο key γίνεται active (υπογράφει), τα παλιά μένουν verify-only μέχρι
+  το `retire_at` τους (overlap window ≥ διάρκεια token => κανείς δεν γίνεται logout)
+
+Config:
+    JWT_KEYS='[{"kid": "2026-10", "secret": "..."},
+               {"kid": "default", "secret": "...", "retire_at": "2026-11-01T00:00:00+00:00"}]'
+    JWT_ACTIVE_KID=2026-10      # default: το τελευταίο key της λίστας
+Χωρίς JWT_KEYS => ένα key "default" από το SECRET_KEY (όπως πριν).
+Tokens χωρίς kid (εκδόθηκαν πριν το keyring) επαληθεύονται με το key "default".
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import calendar
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+ALGORITHM = "HS256"
+DEFAULT_KID = "default"
+
+# μέγιστος αριθμός διαφορετικών header segments που κρατάμε parsed
+_HEADER_CACHE_SIZE = 64
+
+
+class InvalidToken(ValueError):
+    """Invalid / expired / malformed token (ValueError για συμβατότητα με decode_token)."""
+
+
+# -------------------------
+# Encoding helpers
+# -------------------------
+def _json(obj: Dict[str, Any]) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+_FROM_URLSAFE = str.maketrans("-_", "+/")
+
+
+def _b64decode(segment: str) -> bytes:
+    """
+    Strict base64url: μόνο το alphabet (validate=True) και μόνο η canonical μορφή
+    (χωρίς padding, μηδενικά padding bits), ώστε μία υπογραφή να έχει ΜΙΑ έγκυρη κωδικοποίηση.
+    """
+    try:
+        raw = base64.b64decode(segment.translate(_FROM_URLSAFE) + "=" * (-len(segment) % 4), validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidToken("Invalid token") from e
+    if _b64encode(raw) != segment:
+        raise InvalidToken("Invalid token")
+    return raw
+
+
+# -------------------------
+# Keys
+# -------------------------
+@dataclass(frozen=True)
+class TokenKey:
+    kid: str
+    secret: bytes
+    retire_at: Optional[float]  # epoch seconds; None => δεν λήγει
+    mac: Any  # προϋπολογισμένο hmac object
+
+    def sign(self, data: bytes) -> bytes:
+        m = self.mac.copy()
+        m.update(data)
+        return m.digest()
+
+    def usable(self, now: float) -> bool:
+        return self.retire_at is None or now < self.retire_at
+
+
+def make_key(kid: str, secret: str, retire_at: Optional[float] = None) -> TokenKey:
+    raw = secret.encode("utf-8")
+    return TokenKey(kid=kid, secret=raw, retire_at=retire_at, mac=hmac.new(raw, digestmod=hashlib.sha256))
+
+
+def _parse_retire_at(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+class Keyring:
+    """Όλα τα γνωστά keys (verify) + το active key (sign)."""
+
+    def __init__(self, keys: List[TokenKey], active_kid: Optional[str] = None):
+        if not keys:
+            raise ValueError("Keyring needs at least one key")
+        self.keys: Dict[str, TokenKey] = {k.kid: k for k in keys}
+        active_kid = active_kid or keys[-1].kid
+        if active_kid not in self.keys:
+            raise ValueError(f"Active kid {active_kid!r} not in keyring")
+        self.active = self.keys[active_kid]
+        if not self.active.usable(time.time()):
+            raise ValueError(f"Active kid {active_kid!r} is already retired")
+
+        # έτοιμο header segment για το active key (ίδιο σε κάθε token που υπογράφουμε)
+        self.active_header = _b64encode(_json({"alg": ALGORITHM, "typ": "JWT", "kid": self.active.kid}))
+
+    def get(self, kid: Optional[str]) -> Optional[TokenKey]:
+        return self.keys.get(kid or DEFAULT_KID)
+
+
+def load_keyring() -> Keyring:
+    """Χτίζει το keyring από env (JWT_KEYS / JWT_ACTIVE_KID / SECRET_KEY)."""
+    spec = os.getenv("JWT_KEYS")
+    if not spec:
+        return Keyring([make_key(DEFAULT_KID, os.getenv("SECRET_KEY", "CHANGE_ME_SUPER_SECRET"))])
+
+    entries = json.loads(spec)
+    keys = [make_key(str(e["kid"]), str(e["secret"]), _parse_retire_at(e.get("retire_at"))) for e in entries]
+    return Keyring(keys, os.getenv("JWT_ACTIVE_KID") or None)
+
+
+_KEYRING = load_keyring()
+_HEADERS: Dict[str, Optional[str]] = {}  # header segment -> kid
+_LOCK = threading.Lock()
+
+
+def get_keyring() -> Keyring:
+    return _KEYRING
+
+
+def set_keyring(keyring: Keyring) -> None:
+    """Αλλάζει keyring runtime (π.χ. rotation χωρίς restart)."""
+    global _KEYRING
+    with _LOCK:
+        _KEYRING = keyring
+        _HEADERS.clear()
+
+
+def _header_kid(segment: str) -> Optional[str]:
+    try:
+        return _HEADERS[segment]
+    except KeyError:
+        pass
+
+    try:
+        header = json.loads(_b64decode(segment))
+    except ValueError as e:
+        raise InvalidToken("Invalid token") from e
+    if not isinstance(header, dict) or header.get("alg") != ALGORITHM:
+        raise InvalidToken("Invalid token")
+    kid = header.get("kid")
+    if kid is not None and not isinstance(kid, str):
+        raise InvalidToken("Invalid token")
+
+    with _LOCK:
+        if len(_HEADERS) >= _HEADER_CACHE_SIZE:
+            _HEADERS.clear()
+        _HEADERS[segment] = kid
+    return kid
+
+
+# -------------------------
+# Sign / verify
+# -------------------------
+def encode(claims: Dict[str, Any], keyring: Optional[Keyring] = None) -> str:
+    """Υπογράφει claims με το active key (datetime σε exp/iat/nbf => epoch seconds)."""
+    keyring = keyring or _KEYRING
+    payload = dict(claims)
+    for name in ("exp", "iat", "nbf"):
+        if isinstance(payload.get(name), datetime):
+            payload[name] = calendar.timegm(payload[name].utctimetuple())
+
+    signing_input = f"{keyring.active_header}.{_b64encode(_json(payload))}"
+    signature = keyring.active.sign(signing_input.encode("ascii"))
+    return f"{signing_input}.{_b64encode(signature)}"
+
+
+def _int_claim(claims: Dict[str, Any], name: str) -> Optional[int]:
+    if name not in claims:
+        return None
+    try:
+        return int(claims[name])
+    except (TypeError, ValueError) as e:
+        raise InvalidToken("Invalid token") from e
+
+
+def _validate_claims(claims: Dict[str, Any], now: int) -> None:
+    # Ίδιοι έλεγχοι με jose.jwt.decode (χωρίς audience/issuer, leeway 0)
+    exp = _int_claim(claims, "exp")
+    if exp is not None and exp < now:
+        raise InvalidToken("Token expired")
+    nbf = _int_claim(claims, "nbf")
+    if nbf is not None and nbf > now:
+        raise InvalidToken("Token not yet valid")
+    _int_claim(claims, "iat")
+
+    # aud χωρίς αναμενόμενο audience => απόρριψη (όπως jose)
+    if "aud" in claims:
+        raise InvalidToken("Invalid audience")
+    for name in ("sub", "jti"):
+        if name in claims and not isinstance(claims[name], str):
+            raise InvalidToken("Invalid token")
+
+
+def decode(token: str, keyring: Optional[Keyring] = None, now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Verify + decode HS256 token.
+    Αν είναι invalid/expired/retired key → InvalidToken (ValueError).
+    """
+    keyring = keyring or _KEYRING
+    now = time.time() if now is None else now
+
+    parts = token.split(".") if isinstance(token, str) else ()
+    if len(parts) != 3:
+        raise InvalidToken("Invalid token")
+    header_seg, payload_seg, signature_seg = parts
+
+    key = keyring.get(_header_kid(header_seg))
+    if key is None or not key.usable(now):
+        raise InvalidToken("Invalid token")
+
+    try:
+        signing_input = f"{header_seg}.{payload_seg}".encode("ascii")
+    except UnicodeEncodeError as e:
+        raise InvalidToken("Invalid token") from e
+    if not hmac.compare_digest(key.sign(signing_input), _b64decode(signature_seg)):
+        raise InvalidToken("Invalid token")
+
+    try:
+        claims = json.loads(_b64decode(payload_seg))
+    except ValueError as e:
+        raise InvalidToken("Invalid token") from e
+    if not isinstance(claims, dict):
+        raise InvalidToken("Invalid token")
+
+    _validate_claims(claims, int(now))
+    return claims
@@ -0,0 +1,127 @@
+"""
+bench/db_bench.py
+
+Concurrency benchmark για το SQLite engine: default journaling vs tuned
+(app.db.build_engine: WAL + synchronous=NORMAL + mmap/cache_size).
+
+Workload (σε προσωρινή DB, δεν αγγίζει το app.db):
+- readers: point lookups χρήστη by email (όπως login / principal load)
+- writers: signup-like inserts (tenant + user, ένα commit το καθένα)
+
+Αναφέρει reads/s, writes/s και πόσα queries απέτυχαν με "database is locked".
+
+Χρήση (από το backend/):
+    python -m bench.db_bench
+    python -m bench.db_bench --readers 16 --writers 2 --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Sequence
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from app.db import build_engine
+from app.models import Base, Tenant, User
+
+
+def _seed(engine: Engine, n_users: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    tenants = [{"id": f"T{i}", "name": f"Org {i}", "org_type": "college"} for i in range(n_users)]
+    users = [
+        {"id": f"U{i}", "email": f"user{i}@bench.gr", "password_hash": "x", "tenant_id": f"T{i}", "role": "admin"}
+        for i in range(n_users)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Tenant.__table__), tenants)
+        conn.execute(insert(User.__table__), users)
+
+
+def run_workload(engine: Engine, n_users: int, readers: int, writers: int, seconds: float) -> Dict[str, float]:
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    users = User.__table__
+
+    def reader(seed: int) -> None:
+        rnd = random.Random(seed)
+        done = locked = 0
+        while time.perf_counter() < deadline:
+            email = f"user{rnd.randrange(n_users)}@bench.gr"
+            try:
+                with engine.connect() as conn:
+                    conn.execute(select(users.c.id, users.c.tenant_id).where(users.c.email == email)).first()
+                done += 1
+            except OperationalError:
+                locked += 1
+        with lock:
+            counts["reads"] += done
+            counts["locked"] += locked
+
+    def writer() -> None:
+        done = locked = 0
+        while time.perf_counter() < deadline:
+            tid = uuid.uuid4().hex
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(Tenant.__table__).values(id=tid, name="New", org_type="college"))
+                    conn.execute(insert(users).values(
+                        id=uuid.uuid4().hex, email=f"{tid}@bench.gr", password_hash="x", tenant_id=tid, role="admin",
+                    ))
+                done += 1
+            except OperationalError:
+                locked += 1
+        with lock:
+            counts["writes"] += done
+            counts["locked"] += locked
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        "writes_per_s": round(counts["writes"] / elapsed, 1),
+        "locked_errors": counts["locked"],
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="SQLite engine concurrency benchmark")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = {
+            # όπως ήταν πριν: rollback journal, χωρίς PRAGMAs
+            "default": create_engine(f"sqlite:///{Path(tmp) / 'default.db'}", connect_args={"check_same_thread": False}),
+            "tuned": build_engine(f"sqlite:///{Path(tmp) / 'tuned.db'}"),
+        }
+        print(f"{'engine':<10} {'reads/s':>12} {'writes/s':>10} {'locked':>8}")
+        for name, engine in engines.items():
+            _seed(engine, args.users)
+            r = run_workload(engine, args.users, args.readers, args.writers, args.seconds)
+            print(f"{name:<10} {r['reads_per_s']:>12} {r['writes_per_s']:>10} {r['locked_errors']:>8}")
+            engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+"""
+bench/generate.py
+
+Synthetic δεδομένα για benchmarks του rule engine:
+- rulesets οποιουδήποτε μεγέθους στο schema του app/rulesets/college_v1.json
+- ελληνικές ερωτήσεις με ελεγχόμενο ποσοστό τυπογραφικών και τόνων
+
+Όλα είναι deterministic ανά seed ώστε τα νούμερα να συγκρίνονται μεταξύ runs.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+from app.services.actions import ACTIONS
+
+_CONSONANTS = "βγδζθκλμνξπρστφχψ"
+_VOWELS = "αεηιουω"
+_TONOS = {"α": "ά", "ε": "έ", "η": "ή", "ι": "ί", "ο": "ό", "υ": "ύ", "ω": "ώ"}
+_UNTONOS = {v: k for k, v in _TONOS.items()}
+
+# Πραγματικά terms από το college ruleset, για ρεαλιστικά hits
+SEED_TERMS = [
+    "βεβαίωση", "πιστοποιητικό", "φοίτησης", "απουσίες", "αλλαγή", "τμήμα",
+    "μεταφορά", "οικονομ", "δόσεις", "πληρωμή", "ενημερότητα", "εγγραφή",
+    "ωρολόγιο", "πρόγραμμα", "μάθημα", "απόδειξη", "δίδακτρα", "παράπονο",
+    "καταγγελία", "ημερήσιο", "αναφορά", "report",
+]
+
+FILLERS = [
+    "θέλω", "να", "μάθω", "για", "τις", "μου", "παρακαλώ", "το", "μια",
+    "καλημέρα", "πότε", "πώς", "μπορώ", "έχω", "ο", "φοιτητής", "η", "φοιτήτρια",
+]
+
+
+def _word(rng: random.Random, syllables: int) -> str:
+    w = "".join(rng.choice(_CONSONANTS) + rng.choice(_VOWELS) for _ in range(syllables))
+    # τόνος σε τυχαίο φωνήεν
+    vowels = [i for i, ch in enumerate(w) if ch in _TONOS]
+    if vowels:
+        i = rng.choice(vowels)
+        w = w[:i] + _TONOS[w[i]] + w[i + 1:]
+    return w
+
+
+def generate_ruleset(n_rules: int, terms_per_rule: int = 6, seed: int = 1) -> Dict[str, Any]:
+    """
+    Ruleset με n_rules rules. Περίπου 1/3 των rules έχουν και match_all.
+    Τα terms μοιράζονται μεταξύ rules (όπως στα πραγματικά rulesets).
+    """
+    rng = random.Random(seed)
+    vocab = list(dict.fromkeys(SEED_TERMS + [_word(rng, rng.randint(2, 4)) for _ in range(max(50, n_rules * 2))]))
+    action_names = list(ACTIONS) + ["notify_student", "request_approval", "create_ticket"]
+
+    rules: List[Dict[str, Any]] = []
+    for i in range(n_rules):
+        rule_id = f"RULE_{i:05d}"
+        match_any = rng.sample(vocab, min(len(vocab), terms_per_rule))
+        match_all = rng.sample(vocab, 1) if rng.random() < 0.33 else []
+        rules.append({
+            "id": rule_id,
+            "intent": rule_id,
+            "match_any": match_any,
+            "match_all": match_all,
+            "answer": f"Synthetic answer για {rule_id}.",
+            "actions": rng.sample(action_names, rng.randint(0, 3)),
+            "confidence": round(rng.uniform(0.7, 0.95), 2),
+        })
+
+    return {"version": f"bench-{n_rules}", "org_type": "bench", "rules": rules}
+
+
+def _typo(rng: random.Random, w: str) -> str:
+    if len(w) < 3:
+        return w
+    i = rng.randrange(len(w) - 1)
+    op = rng.randrange(3)
+    if op == 0:  # deletion
+        return w[:i] + w[i + 1:]
+    if op == 1:  # substitution
+        return w[:i] + rng.choice(_CONSONANTS + _VOWELS) + w[i + 1:]
+    return w[:i] + w[i + 1] + w[i] + w[i + 2:]  # transposition
+
+
+def _flip_tonos(rng: random.Random, w: str) -> str:
+    # αφαιρεί τόνο αν υπάρχει, αλλιώς βάζει σε τυχαίο φωνήεν
+    if any(ch in _UNTONOS for ch in w):
+        return "".join(_UNTONOS.get(ch, ch) for ch in w)
+    vowels = [i for i, ch in enumerate(w) if ch in _TONOS]
+    if not vowels:
+        return w
+    i = rng.choice(vowels)
+    return w[:i] + _TONOS[w[i]] + w[i + 1:]
+
+
+def generate_questions(
+    ruleset: Dict[str, Any],
+    n: int,
+    typo_rate: float = 0.15,
+    diacritic_rate: float = 0.3,
+    unknown_rate: float = 0.1,
+    seed: int = 2,
+) -> List[str]:
+    """
+    n ερωτήσεις: fillers + 1-3 terms από το ruleset.
+    - typo_rate: πιθανότητα τυπογραφικού ανά λέξη
+    - diacritic_rate: πιθανότητα να αλλάξει ο τονισμός μιας λέξης
+    - unknown_rate: ποσοστό ερωτήσεων χωρίς κανένα term (=> UNKNOWN / fuzzy path)
+    """
+    rng = random.Random(seed)
+    terms = [t for r in ruleset.get("rules", []) for t in (*r.get("match_any", []), *r.get("match_all", []))] or SEED_TERMS
+
+    questions: List[str] = []
+    for _ in range(n):
+        words = rng.sample(FILLERS, rng.randint(2, 6))
+        if rng.random() >= unknown_rate:
+            words += [rng.choice(terms) for _ in range(rng.randint(1, 3))]
+        rng.shuffle(words)
+
+        out = []
+        for w in words:
+            if rng.random() < typo_rate:
+                w = _typo(rng, w)
+            if rng.random() < diacritic_rate:
+                w = _flip_tonos(rng, w)
+            out.append(w)
+
+        q = " ".join(out)
+        if rng.random() < 0.2:
+            q = q.capitalize() + rng.choice(["?", ";", "!!", "."])
+        questions.append(q)
+
+    return questions
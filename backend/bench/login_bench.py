@@ -0,0 +1,96 @@
+"""
+bench/login_bench.py
+
+Throughput benchmark για το password hashing (Argon2) του login.
+
+Για κάθε επίπεδο concurrency τρέχουν N threads που κάνουν verify_password
+(όπως το /auth/login) για --seconds δευτερόλεπτα. Μετράμε:
+- ops/s (πετυχημένα verify)
+- p50 / p99 latency
+- rejected: πόσα απορρίφθηκαν με PasswordHasherBusy (=> 503 στο API)
+
+Το "γόνατο" της καμπύλης είναι εκεί που το ops/s σταματά να ανεβαίνει ενώ
+το p99 συνεχίζει: από εκεί και πάνω η ουρά μόνο προσθέτει latency, οπότε
+εκεί ρυθμίζουμε PASSWORD_HASH_WORKERS / PASSWORD_HASH_MAX_QUEUE.
+
+Χρήση (από το backend/):
+    python -m bench.login_bench
+    python -m bench.login_bench --concurrency 1,4,16,64 --seconds 5
+    ARGON2_MEMORY_COST=19456 ARGON2_TIME_COST=2 python -m bench.login_bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from typing import Any, Dict, List, Sequence
+
+from app.services import auth
+from bench.rules_bench import _percentile
+
+
+def run_level(hashed: str, password: str, concurrency: int, seconds: float) -> Dict[str, float]:
+    timings: List[int] = []
+    rejected = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker() -> None:
+        nonlocal rejected
+        local: List[int] = []
+        local_rejected = 0
+        clock = time.perf_counter_ns
+        while time.perf_counter() < deadline:
+            t0 = clock()
+            try:
+                auth.verify_password(password, hashed)
+            except auth.PasswordHasherBusy:
+                local_rejected += 1
+                time.sleep(0.01)
+                continue
+            local.append(clock() - t0)
+        with lock:
+            timings.extend(local)
+            rejected += local_rejected
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    return {
+        "ops_per_s": round(len(timings) / elapsed, 1),
+        "p50_ms": round(_percentile(timings, 50) / 1000.0, 2),
+        "p99_ms": round(_percentile(timings, 99) / 1000.0, 2),
+        "rejected": rejected,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Argon2 login throughput benchmark")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="comma-separated επίπεδα concurrency")
+    parser.add_argument("--seconds", type=float, default=3.0, help="διάρκεια ανά επίπεδο")
+    args = parser.parse_args(argv)
+
+    password = "correct horse battery staple"
+    hashed = auth.hash_password(password)  # ζεσταίνει και το pool (spawn workers)
+
+    print(f"argon2: {auth.pwd_context.to_dict().get('argon2__time_cost', 'default')} time_cost, "
+          f"{auth.pwd_context.to_dict().get('argon2__memory_cost', 'default')} memory_cost")
+    print(f"pool:   {auth.password_pool_stats()}")
+    print(f"{'concurrency':>12} {'ops/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'rejected':>10}")
+
+    report: Dict[int, Dict[str, Any]] = {}
+    for level in (int(x) for x in args.concurrency.split(",") if x.strip()):
+        r = report[level] = run_level(hashed, password, level, args.seconds)
+        print(f"{level:>12} {r['ops_per_s']:>10} {r['p50_ms']:>10} {r['p99_ms']:>10} {r['rejected']:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+"""
+bench/provision_bench.py
+
+Bulk provisioning (services/provisioning.provision) vs signup-style provisioning
+ανά γραμμή (σειριακό hash + 2 commits + 2 refreshes), σε προσωρινή SQLite DB.
+
+Για να μετράει το I/O / batching και όχι μόνο το Argon2, αν δεν έχουν οριστεί
+ARGON2_* χρησιμοποιούνται φθηνές (ΜΟΝΟ για benchmark) παράμετροι.
+
+Χρήση (από το backend/):
+    python -m bench.provision_bench                      # 10k γραμμές, 400 tenants
+    python -m bench.provision_bench --rows 2000 --baseline-rows 200
+    ARGON2_MEMORY_COST=65536 python -m bench.provision_bench
+"""
+
+from __future__ import annotations
+
+import os
+
+# πριν από οποιοδήποτε import του app (τα spawn workers διαβάζουν το ίδιο env)
+if not any(os.getenv(k) for k in ("ARGON2_TIME_COST", "ARGON2_MEMORY_COST", "ARGON2_PARALLELISM")):
+    os.environ.update({"ARGON2_TIME_COST": "1", "ARGON2_MEMORY_COST": "1024", "ARGON2_PARALLELISM": "1"})
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy.orm import sessionmaker
+
+from app.db import build_engine
+from app.models import Base, Tenant, User
+from app.services import auth
+from app.services.provisioning import provision
+
+
+def generate_rows(n_rows: int, n_tenants: int, prefix: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            "tenant": f"college-{i % n_tenants}",
+            "org_name": f"College {i % n_tenants}",
+            "org_type": "college",
+            "email": f"{prefix}{i}@district.gr",
+            "password": f"pw-{i}-secret",
+            "role": "admin" if i < n_tenants else "staff",
+        }
+        for i in range(n_rows)
+    ]
+
+
+def signup_style(session_factory, rows: List[Dict[str, Any]]) -> None:
+    # Όπως το παλιό signup: ένα hash, ένα tenant commit + refresh, ένα user commit + refresh ανά γραμμή
+    db = session_factory()
+    try:
+        for r in rows:
+            password_hash = auth.hash_password(r["password"])
+            tenant = Tenant(name=r["org_name"], org_type=r["org_type"])
+            db.add(tenant)
+            db.commit()
+            db.refresh(tenant)
+            user = User(email=r["email"], password_hash=password_hash, tenant_id=tenant.id, role=r["role"])
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+    finally:
+        db.close()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk provisioning benchmark")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--tenants", type=int, default=400)
+    parser.add_argument("--baseline-rows", type=int, default=500, help="γραμμές για το signup-style (extrapolation)")
+    args = parser.parse_args(argv)
+
+    print(f"argon2: {auth._ARGON2_SETTINGS or 'passlib defaults'}, pool: {auth.password_pool_stats()}")
+    auth.hash_password("warmup")  # spawn workers εκτός μέτρησης
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{Path(tmp) / 'provision.db'}")
+        Base.metadata.create_all(bind=engine)
+
+        rows = generate_rows(args.baseline_rows, args.tenants, "base")
+        t0 = time.perf_counter()
+        signup_style(sessionmaker(bind=engine), rows)
+        base_s = time.perf_counter() - t0
+        base_rate = len(rows) / base_s
+
+        rows = generate_rows(args.rows, args.tenants, "bulk")
+        t0 = time.perf_counter()
+        report = provision(rows, engine=engine)
+        bulk_s = time.perf_counter() - t0
+        bulk_rate = args.rows / bulk_s
+        engine.dispose()
+
+    print(f"{'mode':<14} {'rows':>8} {'seconds':>10} {'rows/s':>10}")
+    print(f"{'signup-style':<14} {args.baseline_rows:>8} {base_s:>10.2f} {base_rate:>10.1f}")
+    print(f"{'bulk':<14} {args.rows:>8} {bulk_s:>10.2f} {bulk_rate:>10.1f}")
+    print(f"users created: {report['users_created']}, tenants: {report['tenants_created']}, errors: {len(report['errors'])}")
+    print(f"speedup: {bulk_rate / base_rate:.1f}x (signup-style για {args.rows} γραμμές ≈ {args.rows / base_rate:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
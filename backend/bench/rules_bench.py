@@ -0,0 +1,195 @@
+"""
+bench/rules_bench.py
+
+Micro-benchmarks για τον rule engine και τον action runner.
+
+Stages:
+- normalize:   text.normalize_el (χωρίς LRU, καθαρό κόστος normalization)
+- select:      rules._select_rule (full rule scan: strict + fuzzy + scoring, χωρίς cache)
+- fuzzy:       rules._fuzzy_any πάνω σε ΟΛΑ τα match_any terms του ruleset
+- decide:      rules.decide end-to-end (με ruleset + decision cache, όπως στο API)
+- run_actions: actions.run_actions με τα actions του rule που επιλέχθηκε
+
+Χρήση (από το backend/):
+    python -m bench.rules_bench                       # run + report
+    python -m bench.rules_bench --rules 5000          # μεγαλύτερο ruleset
+    python -m bench.rules_bench --save-baseline       # γράφει bench/baseline.json
+    python -m bench.rules_bench --compare             # σύγκριση με baseline (exit 1 σε regression)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from app.services import rules
+from app.services.actions import run_actions
+from app.services.text import normalize_el
+from bench.generate import generate_questions, generate_ruleset
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+STAGES = ("normalize", "select", "fuzzy", "decide", "run_actions")
+
+
+def _percentile(sorted_ns: Sequence[int], p: float) -> float:
+    if not sorted_ns:
+        return 0.0
+    k = min(len(sorted_ns) - 1, max(0, int(round(p / 100.0 * (len(sorted_ns) - 1)))))
+    return sorted_ns[k] / 1000.0  # ns -> µs
+
+
+def _measure(fn: Callable[[Any], Any], items: Sequence[Any], warmup: int) -> Dict[str, float]:
+    for it in items[:warmup]:
+        fn(it)
+
+    timings: List[int] = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for it in items:
+        t0 = clock()
+        fn(it)
+        timings.append(clock() - t0)
+    total_s = (clock() - start) / 1e9
+
+    timings.sort()
+    return {
+        "n": len(items),
+        "ops_per_sec": round(len(items) / total_s, 1) if total_s else 0.0,
+        "p50_us": round(_percentile(timings, 50), 2),
+        "p99_us": round(_percentile(timings, 99), 2),
+    }
+
+
+def run(config: Dict[str, Any], stages: Sequence[str] = STAGES) -> Dict[str, Dict[str, float]]:
+    raw = generate_ruleset(config["rules"], terms_per_rule=config["terms_per_rule"], seed=config["seed"])
+    questions = generate_questions(
+        raw,
+        config["questions"],
+        typo_rate=config["typo_rate"],
+        diacritic_rate=config["diacritic_rate"],
+        seed=config["seed"] + 1,
+    )
+
+    # Το generated ruleset γράφεται σε temp dir ώστε το decide() να περνά από τον κανονικό loader
+    tmp = Path(tempfile.mkdtemp(prefix="rules-bench-"))
+    (tmp / "bench_v1.json").write_text(json.dumps(raw, ensure_ascii=False), encoding="utf-8")
+    rules.RULESETS_DIR = tmp
+    rules.clear_ruleset_cache("bench")
+    rules.clear_decision_cache()
+
+    compiled = rules._load_ruleset("bench")
+    all_any_terms = list(dict.fromkeys(t for cr in compiled.rules for t in cr.match_any))
+    normalized = [normalize_el(q) for q in questions]
+    warmup = min(200, len(questions) // 10)
+
+    rng = random.Random(config["seed"])
+    action_jobs = []
+    for q in questions:
+        selected, _debug = rules._select_rule(compiled, normalize_el(q))
+        actions = selected.rule.get("actions", []) if selected else []
+        action_jobs.append((actions, {"question": q, "fields": {"student_id": rng.choice(["STU-001", "STU-002", "STU-404"])}}))
+
+    stage_fns: Dict[str, Callable[[], Dict[str, float]]] = {
+        "normalize": lambda: _measure(normalize_el, questions, warmup),
+        "select": lambda: _measure(lambda q: rules._select_rule(compiled, q), normalized, warmup),
+        "fuzzy": lambda: _measure(lambda q: rules._fuzzy_any(q, all_any_terms), normalized, warmup),
+        "decide": lambda: _measure(lambda q: rules.decide("bench", q), questions, warmup),
+        "run_actions": lambda: _measure(lambda job: run_actions("DEFAULT", job[0], dict(job[1])), action_jobs, warmup),
+    }
+
+    report: Dict[str, Dict[str, float]] = {}
+    for name in stages:
+        if name == "decide":
+            rules.clear_decision_cache()
+        report[name] = stage_fns[name]()
+    return report
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Επιστρέφει λίστα με regressions (κενή => όλα εντός tolerance)."""
+    regressions: List[str] = []
+    for stage, cur in current.items():
+        base = baseline.get(stage)
+        if not base:
+            continue
+        for metric in ("p50_us", "p99_us"):
+            if base[metric] and cur[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{stage}.{metric}: {cur[metric]} > {base[metric]} (+{tolerance:.0%})")
+        if base["ops_per_sec"] and cur["ops_per_sec"] < base["ops_per_sec"] / (1 + tolerance):
+            regressions.append(f"{stage}.ops_per_sec: {cur['ops_per_sec']} < {base['ops_per_sec']} (-{tolerance:.0%})")
+    return regressions
+
+
+def _print_report(report: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]] | None) -> None:
+    print(f"{'stage':<12} {'n':>7} {'ops/s':>12} {'p50 µs':>10} {'p99 µs':>10}  vs baseline (p50)")
+    for stage, m in report.items():
+        delta = ""
+        base = (baseline or {}).get(stage)
+        if base and base.get("p50_us"):
+            delta = f"{(m['p50_us'] / base['p50_us'] - 1) * 100:+.1f}%"
+        print(f"{stage:<12} {m['n']:>7} {m['ops_per_sec']:>12,.1f} {m['p50_us']:>10.2f} {m['p99_us']:>10.2f}  {delta}")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Rule engine micro-benchmarks")
+    parser.add_argument("--rules", type=int, default=500, help="πλήθος synthetic rules")
+    parser.add_argument("--terms-per-rule", type=int, default=6)
+    parser.add_argument("--questions", type=int, default=2000, help="μέγεθος question corpus")
+    parser.add_argument("--typo-rate", type=float, default=0.15)
+    parser.add_argument("--diacritic-rate", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated υποσύνολο των stages")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="αποθήκευση αποτελεσμάτων ως baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 αν υπάρχει regression πάνω από tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+
+    config = {
+        "rules": args.rules,
+        "terms_per_rule": args.terms_per_rule,
+        "questions": args.questions,
+        "typo_rate": args.typo_rate,
+        "diacritic_rate": args.diacritic_rate,
+        "seed": args.seed,
+    }
+
+    baseline_doc: Dict[str, Any] | None = None
+    if args.baseline.exists():
+        baseline_doc = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline_doc.get("config") != config:
+            print(f"warning: baseline config differs: {baseline_doc.get('config')}", file=sys.stderr)
+
+    report = run(config, stages)
+    _print_report(report, (baseline_doc or {}).get("stages"))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({"config": config, "stages": report}, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline saved: {args.baseline}")
+
+    if args.compare:
+        if not baseline_doc:
+            print("no baseline to compare against", file=sys.stderr)
+            return 2
+        regressions = compare(report, baseline_doc.get("stages", {}), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())